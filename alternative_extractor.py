@@ -2,13 +2,188 @@
 
 import logging
 import re
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List, Tuple
 import aiohttp
 import json
 import asyncio
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads  # stdlib fallback, also accepts bytes
+
 logger = logging.getLogger(__name__)
 
+_DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Matches watch, short-link, embed, shorts and legacy /v/ URLs in one pass
+_VIDEO_ID_RE = re.compile(r'(?:youtube\.com/(?:watch\?v=|embed/|shorts/|v/)|youtu\.be/)([^&\n?#]+)')
+
+# Pre-parsed URL templates (bound str.format) for the fallback lookups
+_WATCH_TPL = "https://www.youtube.com/watch?v={}".format
+_OEMBED_TPL = "https://www.youtube.com/oembed?url=https%3A//www.youtube.com/watch%3Fv%3D{}&format=json".format
+_NOEMBED_TPL = "https://noembed.com/embed?url=https%3A//www.youtube.com/watch%3Fv%3D{}".format
+
+# The few top-level string fields we read from oEmbed/noEmbed responses
+_OEMBED_FIELDS = re.compile(rb'"(title|author_name|thumbnail_url|error)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# Fields every fallback info dict shares; builders merge their own values on top
+_INFO_PROTO: Dict[str, Any] = {
+    'duration': None,
+    'view_count': None,
+    'upload_date': None,
+    'uploader': 'Unknown',
+    'description': '',
+    'thumbnail': None,
+}
+
+# Shared session so fallback lookups reuse pooled TCP/TLS connections
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+# Cached DNS answers for www.youtube.com / noembed.com
+_DNS_CACHE_TTL = 300
+
+# Idle connections are kept for 120s; a cheap ping every 90s keeps the YouTube one alive
+_KEEPALIVE_URL = "https://www.youtube.com/generate_204"
+_KEEPALIVE_INTERVAL = 90
+_KEEPALIVE_TASK: Optional[asyncio.Task] = None
+
+
+def _make_resolver() -> aiohttp.abc.AbstractResolver:
+    """Use aiodns with a bounded lookup time when available, else the threaded resolver."""
+    try:
+        return aiohttp.AsyncResolver(timeout=2)
+    except RuntimeError:
+        # aiodns not installed
+        return aiohttp.ThreadedResolver()
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Get or create the shared HTTP session for fallback lookups."""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers=_DEFAULT_HEADERS,
+            connector=aiohttp.TCPConnector(
+                limit=32,
+                limit_per_host=8,
+                use_dns_cache=True,
+                ttl_dns_cache=_DNS_CACHE_TTL,
+                resolver=_make_resolver(),
+                keepalive_timeout=120,
+                force_close=False
+            )
+        )
+        _start_keepalive()
+    return _SESSION
+
+
+def _start_keepalive() -> None:
+    """Start the background ping that keeps the pooled connection warm."""
+    global _KEEPALIVE_TASK
+    if _KEEPALIVE_TASK is None or _KEEPALIVE_TASK.done():
+        _KEEPALIVE_TASK = asyncio.create_task(_keep_pool_warm())
+
+
+async def _keep_pool_warm() -> None:
+    """Periodically touch YouTube so the pooled TLS connection survives idle gaps."""
+    while True:
+        await asyncio.sleep(_KEEPALIVE_INTERVAL)
+        session = _SESSION
+        if session is None or session.closed:
+            return
+        try:
+            async with session.get(_KEEPALIVE_URL) as response:
+                await response.read()
+        except Exception as e:
+            logger.debug(f"Keep-alive ping failed: {e}")
+
+
+async def close_session() -> None:
+    """Close the shared HTTP session (call on shutdown)."""
+    global _SESSION, _KEEPALIVE_TASK
+    if _KEEPALIVE_TASK is not None:
+        _KEEPALIVE_TASK.cancel()
+        _KEEPALIVE_TASK = None
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+def _read_fields(body: bytes) -> Dict[str, str]:
+    """Pull the fields we need out of an oEmbed-style JSON body without decoding all of it."""
+    fields: Dict[str, str] = {}
+    for m in _OEMBED_FIELDS.finditer(body):
+        raw = m[2]
+        # Only values containing escapes (\", \u00e9, ...) need a real JSON string decode
+        value = _json_loads(b'"' + raw + b'"') if b'\\' in raw else raw.decode()
+        fields.setdefault(m[1].decode(), value)
+    return fields
+
+
+def _make_info(
+    video_id: str,
+    title: str = 'Unknown Title',
+    uploader: str = 'Unknown',
+    thumbnail: Optional[str] = None,
+    extractor: str = 'fallback',
+    description: Optional[str] = None,
+    ext: str = 'webm',
+    format_id: str = 'fallback'
+) -> Dict[str, Any]:
+    """Build a yt-dlp style info dict for a fallback result."""
+    webpage = _WATCH_TPL(video_id)
+    return _INFO_PROTO | {
+        'id': video_id,
+        'title': title,
+        'uploader': uploader,
+        'webpage_url': webpage,
+        'thumbnail': thumbnail,
+        'description': f"Video by {uploader}" if description is None else description,
+        'url': webpage,
+        'formats': [{'url': webpage, 'ext': ext, 'format_id': format_id}],
+        'extractor': extractor
+    }
+
+
+# Successful lookups keyed by video ID: video_id -> (expires_at, info)
+_INFO_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_INFO_CACHE_TTL = 300
+_INFO_CACHE_MAX = 256
+# One lookup per video ID at a time: video_id -> [lock, callers holding or waiting on it]
+_INFO_LOCKS: Dict[str, List[Any]] = {}
+
+
+def _cache_info(video_id: str, info: Dict[str, Any]) -> None:
+    """Store a successful lookup, dropping expired entries when the cache gets large."""
+    now = time.monotonic()
+    if len(_INFO_CACHE) >= _INFO_CACHE_MAX:
+        for key in [k for k, (expires, _) in _INFO_CACHE.items() if expires <= now]:
+            del _INFO_CACHE[key]
+        while len(_INFO_CACHE) >= _INFO_CACHE_MAX:
+            del _INFO_CACHE[next(iter(_INFO_CACHE))]
+    _INFO_CACHE[video_id] = (now + _INFO_CACHE_TTL, info)
+
+
+# Video IDs whose metadata lookups all failed: video_id -> retry_after
+_NEGCACHE: Dict[str, float] = {}
+_NEGCACHE_TTL = 60
+
+
+def _remember_failure(video_id: str) -> None:
+    """Skip metadata lookups for a video for a short while after they all failed."""
+    now = time.monotonic()
+    if len(_NEGCACHE) >= _INFO_CACHE_MAX:
+        for key in [k for k, retry_after in _NEGCACHE.items() if retry_after <= now]:
+            del _NEGCACHE[key]
+    _NEGCACHE[video_id] = now + _NEGCACHE_TTL
+
+
 class AlternativeExtractor:
     """Alternative extractor for when yt-dlp fails with bot detection."""
     
@@ -18,146 +193,121 @@ class AlternativeExtractor:
         video_id = AlternativeExtractor._extract_video_id(url)
         if not video_id:
             return None
+        
+        cached = _INFO_CACHE.get(video_id)
+        if cached and cached[0] > time.monotonic():
+            return dict(cached[1])  # Copy, so callers can't alter the cached entry
+        
+        # Both metadata endpoints recently failed for this video; don't retry yet
+        if _NEGCACHE.get(video_id, 0) > time.monotonic():
+            return AlternativeExtractor._make_blocked(video_id)
             
         try:
-            # Try multiple methods in order of reliability
-            methods = [
-                AlternativeExtractor._try_oembed,
-                AlternativeExtractor._try_noembed,
-                AlternativeExtractor._try_youtube_api_fallback
-            ]
+            session = await _get_session()
             
-            for method in methods:
-                try:
-                    result = await method(video_id)
-                    if result:
-                        return result
-                except Exception as e:
-                    logger.debug(f"Method {method.__name__} failed: {e}")
-                    continue
+            # One lookup per video ID at a time; concurrent callers wait for it
+            entry = _INFO_LOCKS.get(video_id)
+            if entry is None:
+                entry = _INFO_LOCKS[video_id] = [asyncio.Lock(), 0]
+            entry[1] += 1
+            try:
+                async with entry[0]:
+                    cached = _INFO_CACHE.get(video_id)
+                    if cached and cached[0] > time.monotonic():
+                        return dict(cached[1])
                     
-            return None
+                    result = await AlternativeExtractor._lookup_metadata(video_id, session)
+                    if result:
+                        _cache_info(video_id, result)
+                        return dict(result)
+            finally:
+                # Only the last caller drops the lock; a waiter may still be queued on it
+                entry[1] -= 1
+                if not entry[1]:
+                    del _INFO_LOCKS[video_id]
+            
+            # Last resort: minimal metadata for user notification
+            _remember_failure(video_id)
+            return AlternativeExtractor._make_blocked(video_id)
         except Exception as e:
             logger.warning(f"Alternative extraction failed: {e}")
             return None
     
     @staticmethod
-    def _extract_video_id(url: str) -> Optional[str]:
-        """Extract video ID from YouTube URL."""
-        patterns = [
-            r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/|youtube\.com/shorts/)([^&\n?#]+)',
-            r'youtube\.com/v/([^&\n?#]+)',
+    async def _lookup_metadata(video_id: str, session: aiohttp.ClientSession) -> Optional[Dict[str, Any]]:
+        """Race both metadata endpoints and keep whichever answers first."""
+        tasks = [
+            asyncio.create_task(AlternativeExtractor._try_oembed(video_id, session)),
+            asyncio.create_task(AlternativeExtractor._try_noembed(video_id, session)),
         ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=8):
+                try:
+                    result = await next_done
+                except Exception as e:
+                    logger.debug(f"Metadata lookup failed: {e}")
+                    continue
+                if result:
+                    return result
+        finally:
+            for task in tasks:
+                task.cancel()
         return None
     
     @staticmethod
-    async def _try_oembed(video_id: str) -> Optional[Dict[str, Any]]:
+    def _extract_video_id(url: str) -> Optional[str]:
+        """Extract video ID from YouTube URL."""
+        match = _VIDEO_ID_RE.search(url)
+        return match.group(1) if match else None
+    
+    @staticmethod
+    async def _try_oembed(video_id: str, session: aiohttp.ClientSession) -> Optional[Dict[str, Any]]:
         """Try YouTube's oEmbed API."""
-        oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-        
-        timeout = aiohttp.ClientTimeout(total=10)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            async with session.get(oembed_url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Create a simplified info dict
-                    return {
-                        'id': video_id,
-                        'title': data.get('title', 'Unknown Title'),
-                        'uploader': data.get('author_name', 'Unknown'),
-                        'duration': None,  # oEmbed doesn't provide duration
-                        'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
-                        'thumbnail': data.get('thumbnail_url'),
-                        'description': f"Video by {data.get('author_name', 'Unknown')}",
-                        'view_count': None,
-                        'upload_date': None,
-                        'url': f"https://www.youtube.com/watch?v={video_id}",
-                        'formats': [
-                            {
-                                'url': f"https://www.youtube.com/watch?v={video_id}",
-                                'ext': 'webm',
-                                'format_id': 'fallback'
-                            }
-                        ],
-                        'extractor': 'oembed_fallback'
-                    }
+        async with session.get(_OEMBED_TPL(video_id)) as response:
+            if response.status == 200:
+                data = _read_fields(await response.read())
+                # oEmbed doesn't provide duration
+                return _make_info(
+                    video_id,
+                    title=data.get('title', 'Unknown Title'),
+                    uploader=data.get('author_name', 'Unknown'),
+                    thumbnail=data.get('thumbnail_url'),
+                    extractor='oembed_fallback'
+                )
         return None
     
     @staticmethod
-    async def _try_noembed(video_id: str) -> Optional[Dict[str, Any]]:
+    async def _try_noembed(video_id: str, session: aiohttp.ClientSession) -> Optional[Dict[str, Any]]:
         """Try NoEmbed API as secondary fallback."""
-        noembed_url = f"https://noembed.com/embed?url=https://www.youtube.com/watch?v={video_id}"
-        
-        timeout = aiohttp.ClientTimeout(total=10)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            async with session.get(noembed_url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if not data.get('error'):
-                        return {
-                            'id': video_id,
-                            'title': data.get('title', 'Unknown Title'),
-                            'uploader': data.get('author_name', 'Unknown'),
-                            'duration': None,
-                            'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
-                            'thumbnail': data.get('thumbnail_url'),
-                            'description': f"Video by {data.get('author_name', 'Unknown')}",
-                            'view_count': None,
-                            'upload_date': None,
-                            'url': f"https://www.youtube.com/watch?v={video_id}",
-                            'formats': [
-                                {
-                                    'url': f"https://www.youtube.com/watch?v={video_id}",
-                                    'ext': 'webm',
-                                    'format_id': 'noembed_fallback'
-                                }
-                            ],
-                            'extractor': 'noembed_fallback'
-                        }
+        async with session.get(_NOEMBED_TPL(video_id)) as response:
+            if response.status == 200:
+                data = _read_fields(await response.read())
+                if not data.get('error'):
+                    return _make_info(
+                        video_id,
+                        title=data.get('title', 'Unknown Title'),
+                        uploader=data.get('author_name', 'Unknown'),
+                        thumbnail=data.get('thumbnail_url'),
+                        extractor='noembed_fallback',
+                        format_id='noembed_fallback'
+                    )
         return None
     
     @staticmethod
-    async def _try_youtube_api_fallback(video_id: str) -> Optional[Dict[str, Any]]:
+    def _make_blocked(video_id: str) -> Dict[str, Any]:
         """Last resort: create minimal metadata for user notification."""
         # This doesn't actually fetch from YouTube API (would need API key)
         # but creates a basic structure for error display
-        await asyncio.sleep(0.1)  # Small delay to simulate API call
-        
-        return {
-            'id': video_id,
-            'title': f'YouTube Video {video_id}',
-            'uploader': 'YouTube',
-            'duration': None,
-            'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
-            'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-            'description': 'Video temporarily unavailable due to access restrictions',
-            'view_count': None,
-            'upload_date': None,
-            'url': f"https://www.youtube.com/watch?v={video_id}",
-            'formats': [
-                {
-                    'url': f"https://www.youtube.com/watch?v={video_id}",
-                    'ext': 'unavailable',
-                    'format_id': 'blocked'
-                }
-            ],
-            'extractor': 'blocked_fallback'
-        }
+        return _make_info(
+            video_id,
+            title=f'YouTube Video {video_id}',
+            uploader='YouTube',
+            thumbnail=f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+            extractor='blocked_fallback',
+            description='Video temporarily unavailable due to access restrictions',
+            ext='unavailable',
+            format_id='blocked'
+        )
 
 async def fallback_extract(url: str) -> Optional[Dict[str, Any]]:
     """Main fallback extraction function."""
@@ -1,30 +1,63 @@
 """Configuration settings for the Discord Music Bot."""
 
+import mmap
 import os
-from typing import Dict, Any
+import re
+import sys
+from typing import Dict, Any, Union
 from pathlib import Path
+from types import MappingProxyType
+
+# KEY=VALUE lines; the value is unquoted/trimmed in one strip() call
+_ENV_LINE = re.compile(rb'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=([^\r\n]*)', re.M)
+_ENV_VALUE_STRIP = b' \t"\''
+
+
+def _parse_env(data: Union[bytes, mmap.mmap]) -> Dict[str, str]:
+    """Parse the contents of a .env file into a dict."""
+    return {
+        m[1].decode(): m[2].strip(_ENV_VALUE_STRIP).decode()
+        for m in _ENV_LINE.finditer(data)
+    }
+
 
 # Load environment variables from .env file
 def load_env_file() -> None:
     """Load environment variables from .env file if it exists."""
     env_file = Path(__file__).parent / '.env'
-    if env_file.exists():
-        with open(env_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip().strip('"').strip("'")
-                    os.environ[key] = value
+    if env_file.exists() and env_file.stat().st_size:
+        with open(env_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            os.environ.update(_parse_env(mm))
 
 # Load .env file before accessing environment variables
 load_env_file()
 
+# Cap glibc resolver waits so blocking lookups (yt-dlp worker threads) can't stall for long
+if sys.platform.startswith('linux'):
+    os.environ.setdefault('RES_OPTIONS', 'timeout:2 attempts:1')
+
 # Bot configuration
 BOT_PREFIX = '!'
 BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN', '')
 
+# Backoff (seconds) for yt-dlp HTTP retries, indexed by retry number
+_RETRY_DELAYS = (1, 4, 16, 30, 30, 30)
+
+# Read-only and interned once at import; yt-dlp merges these into its own header dict per instance
+_HTTP_HEADERS = MappingProxyType({sys.intern(k): sys.intern(v) for k, v in {
+    'User-Agent': 'Mozilla/5.0 (Linux; Android 11; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+}.items()})
+
 # yt-dlp configuration for audio extraction
 YTDL_FORMAT_OPTIONS: Dict[str, Any] = {
     'format': 'bestaudio[ext=webm]/bestaudio[ext=m4a]/bestaudio',
@@ -37,10 +70,10 @@ YTDL_FORMAT_OPTIONS: Dict[str, Any] = {
     'quiet': True,
     'no_warnings': True,
     'default_search': 'auto',
-    'source_address': '0.0.0.0',
+    'socket_timeout': 5,
     # Enhanced extraction for 2024-2025 YouTube measures
     'extractor_retries': 3,
-    'retry_sleep_functions': {'http': lambda n: min(4 ** n, 30)},
+    'retry_sleep_functions': {'http': lambda n, _t=_RETRY_DELAYS: _t[n] if n < len(_t) else 30},
     # Modern YouTube client strategies
     'extractor_args': {
         'youtube': {
@@ -50,30 +83,34 @@ YTDL_FORMAT_OPTIONS: Dict[str, Any] = {
         }
     },
     # Optimized headers for mobile web client
-    'http_headers': {
-        'User-Agent': 'Mozilla/5.0 (Linux; Android 11; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Sec-Fetch-User': '?1',
-    },
+    'http_headers': _HTTP_HEADERS,
     # Rate limiting for bot detection avoidance
     'sleep_interval': 1,
     'max_sleep_interval': 3,
 }
 
+# Input options shared by every FFmpeg profile: reconnect on dropped streams
+_RECONNECT_BEFORE = (
+    '-reconnect 1 '
+    '-reconnect_streamed 1 '
+    '-reconnect_delay_max 5 '
+)
+
+# Input options for constrained hosts (shared by the Render and Opus profiles)
+_COMMON_BEFORE = (
+    _RECONNECT_BEFORE +
+    '-reconnect_at_eof 1 '
+    '-timeout 30000000 '  # 30 second timeout for Render's network
+    '-probesize 50M '     # Reduced for memory constraints
+    '-analyzeduration 50M '  # Reduced for memory constraints
+    '-err_detect ignore_err '  # Continue despite minor errors
+    '-fflags +discardcorrupt'  # Discard corrupted packets
+)
+
 # FFmpeg options for optimal Discord streaming
 FFMPEG_OPTIONS: Dict[str, str] = {
     'before_options': (
-        '-reconnect 1 '
-        '-reconnect_streamed 1 '
-        '-reconnect_delay_max 5 '
+        _RECONNECT_BEFORE +
         '-probesize 32 '
         '-fflags +discardcorrupt'
     ),
@@ -82,17 +119,7 @@ FFMPEG_OPTIONS: Dict[str, str] = {
 
 # Render.com optimized FFmpeg options for deployment
 RENDER_FFMPEG_OPTIONS: Dict[str, str] = {
-    'before_options': (
-        '-reconnect 1 '
-        '-reconnect_streamed 1 '
-        '-reconnect_delay_max 5 '
-        '-reconnect_at_eof 1 '
-        '-timeout 30000000 '  # 30 second timeout for Render's network
-        '-probesize 50M '     # Reduced for memory constraints
-        '-analyzeduration 50M '  # Reduced for memory constraints
-        '-err_detect ignore_err '  # Continue despite minor errors
-        '-fflags +discardcorrupt'  # Discard corrupted packets
-    ),
+    'before_options': _COMMON_BEFORE,
     'options': (
         '-vn '  # No video processing
         '-bufsize 512k '  # Conservative buffer for 512MB RAM limit
@@ -104,17 +131,7 @@ RENDER_FFMPEG_OPTIONS: Dict[str, str] = {
 
 # FFmpeg Opus options (alternative for better quality)
 FFMPEG_OPUS_OPTIONS: Dict[str, str] = {
-    'before_options': (
-        '-reconnect 1 '
-        '-reconnect_streamed 1 '
-        '-reconnect_delay_max 5 '
-        '-reconnect_at_eof 1 '
-        '-timeout 30000000 '
-        '-probesize 50M '
-        '-analyzeduration 50M '
-        '-err_detect ignore_err '
-        '-fflags +discardcorrupt'
-    ),
+    'before_options': _COMMON_BEFORE,
     'options': (
         '-vn '
         '-c:a libopus '
@@ -132,3 +149,8 @@ FFMPEG_OPUS_OPTIONS: Dict[str, str] = {
 MAX_QUEUE_DISPLAY = 10
 DEFAULT_VOLUME = 0.5
 MAX_SEARCH_RESULTS = 5
+
+# Voice settings
+IDLE_DISCONNECT_DELAY = 60  # Seconds alone in a voice channel before leaving
+STATE_IDLE_TTL = 3600  # Seconds before an unused guild's queue state is dropped
+STATE_SWEEP_INTERVAL = 600  # Seconds between idle guild state sweeps
@@ -7,15 +7,22 @@ including syncing, clearing, and testing command registration.
 
 import asyncio
 import argparse
+import hashlib
+import json
 import logging
+import os
 import sys
-from typing import Optional
-
-import discord
-from discord.ext import commands
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from config import BOT_TOKEN, BOT_PREFIX
-from register_commands import CommandRegistrar
+
+# discord.py is imported lazily so `--help` and argument errors return instantly
+if TYPE_CHECKING:
+    from discord.ext import commands
+    from discord.http import HTTPClient
+    from register_commands import CommandRegistrar
 
 
 # Configure logging
@@ -25,143 +32,219 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrent per-guild REST calls when several guild IDs are given
+_GUILD_CONCURRENCY = 8
+
+# Application IDs keyed by a hash of the bot token, so repeat runs skip the lookup
+_APP_ID_CACHE = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "rmusico" / "application_ids.json"
+
+
+def _new_http_client() -> 'HTTPClient':
+    """Create a bare discord.py REST client on the running loop."""
+    from discord.http import HTTPClient
+    return HTTPClient(asyncio.get_running_loop())
+
+
+async def _per_guild(guild_ids: List[int], call: Callable[[int], Awaitable[Any]]) -> List[Any]:
+    """Run call(guild_id) for each guild, at most _GUILD_CONCURRENCY at once; errors are returned, not raised."""
+    sem = asyncio.Semaphore(_GUILD_CONCURRENCY)
+    
+    async def _one(guild_id: int) -> Any:
+        async with sem:
+            return await call(guild_id)
+    
+    return await asyncio.gather(*(_one(g) for g in guild_ids), return_exceptions=True)
+
 
 class CommandManager:
     """Manages Discord command registration and synchronization."""
     
     def __init__(self, token: str):
         self.token = token
-        self.bot: Optional[commands.Bot] = None
-        self.registrar: Optional[CommandRegistrar] = None
+        self.bot: Optional['commands.Bot'] = None
+        self.registrar: Optional['CommandRegistrar'] = None
+        self._http: Optional['HTTPClient'] = None
+        self._app_id: Optional[int] = None
+    
+    async def __aenter__(self) -> 'CommandManager':
+        """Log in once so several actions can share one REST session."""
+        http = _new_http_client()
+        try:
+            await http.static_login(self.token)
+            self._app_id = await self._application_id(http)
+        except BaseException:
+            await http.close()
+            raise
+        self._http = http
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the shared REST session."""
+        if self._http:
+            await self._http.close()
+            self._http = None
     
     async def setup_bot(self) -> None:
-        """Set up the bot instance."""
+        """Set up the bot instance used to build the slash command payload (never logged in)."""
+        import discord
+        from discord.ext import commands
+        from register_commands import CommandRegistrar, MusicSlashCommands
+        
         intents = discord.Intents.default()
         intents.message_content = True
         intents.voice_states = True
         
         self.bot = commands.Bot(command_prefix=BOT_PREFIX, intents=intents)
         self.registrar = CommandRegistrar(self.bot)
-        
-        @self.bot.event
-        async def on_ready():
-            logger.info(f"Bot connected as {self.bot.user}")
+        await self.bot.add_cog(MusicSlashCommands(self.bot))
     
-    async def sync_global(self) -> None:
-        """Sync commands globally."""
+    async def _command_payload(self) -> List[Dict[str, Any]]:
+        """Serialize the bot's slash commands into the JSON Discord expects."""
         if not self.bot:
             await self.setup_bot()
+        return [cmd.to_dict(self.bot.tree) for cmd in self.bot.tree.get_commands()]
+    
+    async def _application_id(self, http: 'HTTPClient') -> int:
+        """Return the application ID for this token, cached on disk by token hash."""
+        key = hashlib.sha256(self.token.encode()).hexdigest()
+        try:
+            cached = json.loads(_APP_ID_CACHE.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = {}
         
-        await self.bot.login(self.token)
+        if key in cached:
+            return int(cached[key])
         
+        app_id = int((await http.application_info())['id'])
+        cached[key] = app_id
         try:
-            logger.info("Syncing commands globally...")
-            synced = await self.registrar.sync_commands()
-            logger.info(f"Successfully synced {len(synced)} commands globally")
+            _APP_ID_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            tmp = _APP_ID_CACHE.with_suffix('.tmp')
+            tmp.write_text(json.dumps(cached), encoding="utf-8")
+            os.replace(tmp, _APP_ID_CACHE)
+        except OSError as e:
+            logger.debug("Could not cache application ID: %s", e)
+        return app_id
+    
+    @asynccontextmanager
+    async def _rest_only(self) -> AsyncIterator[Tuple['HTTPClient', int]]:
+        """Open a bare REST client (no gateway, no cache) and resolve the application ID."""
+        if self._http:
+            # Inside `async with CommandManager(...)`: reuse the open session
+            yield self._http, self._app_id
+            return
+        
+        http = _new_http_client()
+        try:
+            await http.static_login(self.token)
+            yield http, await self._application_id(http)
+        finally:
+            await http.close()
+    
+    async def sync_global(self) -> None:
+        """Sync commands globally."""
+        try:
+            payload = await self._command_payload()
+            async with self._rest_only() as (http, app_id):
+                logger.info("Syncing commands globally...")
+                synced = await http.bulk_upsert_global_commands(app_id, payload)
+            logger.info("Successfully synced %s commands globally", len(synced))
             logger.warning("Note: Global sync can take up to 1 hour to propagate")
             
         except Exception as e:
-            logger.error(f"Error syncing commands globally: {e}")
-        finally:
-            await self.bot.close()
+            logger.error("Error syncing commands globally: %s", e)
     
     async def sync_guild(self, guild_id: int) -> None:
         """Sync commands to a specific guild."""
-        if not self.bot:
-            await self.setup_bot()
-        
-        await self.bot.login(self.token)
-        
+        await self.sync_guilds([guild_id])
+    
+    async def sync_guilds(self, guild_ids: List[int]) -> None:
+        """Sync commands to several guilds concurrently over one REST session."""
         try:
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                # Try to fetch the guild
-                guild = await self.bot.fetch_guild(guild_id)
-            
-            if not guild:
-                logger.error(f"Guild {guild_id} not found")
-                return
-            
-            logger.info(f"Syncing commands to guild: {guild.name} ({guild_id})")
-            synced = await self.registrar.sync_commands(guild)
-            logger.info(f"Successfully synced {len(synced)} commands to {guild.name}")
+            payload = await self._command_payload()
+            async with self._rest_only() as (http, app_id):
+                logger.info("Syncing commands to %s guild(s)", len(guild_ids))
+                results = await _per_guild(
+                    guild_ids, lambda guild_id: http.bulk_upsert_guild_commands(app_id, guild_id, payload)
+                )
             
         except Exception as e:
-            logger.error(f"Error syncing commands to guild {guild_id}: {e}")
-        finally:
-            await self.bot.close()
+            logger.error("Error syncing commands to guilds: %s", e)
+            return
+        
+        for guild_id, result in zip(guild_ids, results):
+            if isinstance(result, BaseException):
+                logger.error("Error syncing commands to guild %s: %s", guild_id, result)
+            else:
+                logger.info("Successfully synced %s commands to guild %s", len(result), guild_id)
     
     async def clear_global(self) -> None:
         """Clear all global commands."""
-        if not self.bot:
-            await self.setup_bot()
-        
-        await self.bot.login(self.token)
-        
         try:
-            logger.info("Clearing all global commands...")
-            await self.registrar.clear_commands()
+            async with self._rest_only() as (http, app_id):
+                logger.info("Clearing all global commands...")
+                await http.bulk_upsert_global_commands(app_id, [])
             logger.info("Successfully cleared all global commands")
             
         except Exception as e:
-            logger.error(f"Error clearing global commands: {e}")
-        finally:
-            await self.bot.close()
+            logger.error("Error clearing global commands: %s", e)
     
     async def clear_guild(self, guild_id: int) -> None:
         """Clear commands from a specific guild."""
-        if not self.bot:
-            await self.setup_bot()
-        
-        await self.bot.login(self.token)
-        
+        await self.clear_guilds([guild_id])
+    
+    async def clear_guilds(self, guild_ids: List[int]) -> None:
+        """Clear commands from several guilds concurrently over one REST session."""
         try:
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                guild = await self.bot.fetch_guild(guild_id)
-            
-            if not guild:
-                logger.error(f"Guild {guild_id} not found")
-                return
-            
-            logger.info(f"Clearing commands from guild: {guild.name} ({guild_id})")
-            await self.registrar.clear_commands(guild)
-            logger.info(f"Successfully cleared commands from {guild.name}")
+            async with self._rest_only() as (http, app_id):
+                logger.info("Clearing commands from %s guild(s)", len(guild_ids))
+                results = await _per_guild(
+                    guild_ids, lambda guild_id: http.bulk_upsert_guild_commands(app_id, guild_id, [])
+                )
             
         except Exception as e:
-            logger.error(f"Error clearing commands from guild {guild_id}: {e}")
-        finally:
-            await self.bot.close()
+            logger.error("Error clearing commands from guilds: %s", e)
+            return
+        
+        for guild_id, result in zip(guild_ids, results):
+            if isinstance(result, BaseException):
+                logger.error("Error clearing commands from guild %s: %s", guild_id, result)
+            else:
+                logger.info("Successfully cleared commands from guild %s", guild_id)
     
     async def list_commands(self, guild_id: Optional[int] = None) -> None:
-        """List registered commands."""
-        if not self.bot:
-            await self.setup_bot()
-        
-        await self.bot.login(self.token)
-        
+        """List the commands currently registered with Discord."""
         try:
-            if guild_id:
-                guild = self.bot.get_guild(guild_id) or await self.bot.fetch_guild(guild_id)
-                if not guild:
-                    logger.error(f"Guild {guild_id} not found")
-                    return
-                commands = self.bot.tree.get_commands(guild=guild)
-                logger.info(f"Commands in guild {guild.name} ({guild_id}):")
-            else:
-                commands = self.bot.tree.get_commands()
-                logger.info("Global commands:")
+            async with self._rest_only() as (http, app_id):
+                if guild_id:
+                    commands = await http.get_guild_commands(app_id, guild_id)
+                    logger.info("Commands in guild %s:", guild_id)
+                else:
+                    commands = await http.get_global_commands(app_id)
+                    logger.info("Global commands:")
             
             if not commands:
                 logger.info("No commands found")
             else:
                 for cmd in commands:
-                    logger.info(f"  - /{cmd.name}: {cmd.description}")
+                    logger.info("  - /%s: %s", cmd['name'], cmd['description'])
             
         except Exception as e:
-            logger.error(f"Error listing commands: {e}")
-        finally:
-            await self.bot.close()
+            logger.error("Error listing commands: %s", e)
+
+
+async def _list_each(manager: CommandManager, guild_ids: Optional[List[int]]) -> None:
+    """List commands for each guild in turn (or the global ones)."""
+    for guild_id in guild_ids or [None]:
+        await manager.list_commands(guild_id)
+
+
+# CLI action -> coroutine taking the manager and the optional guild IDs
+DISPATCH: Dict[str, Callable[[CommandManager, Optional[List[int]]], Awaitable[Any]]] = {
+    'sync': lambda m, guild_ids: m.sync_guilds(guild_ids) if guild_ids else m.sync_global(),
+    'clear': lambda m, guild_ids: m.clear_guilds(guild_ids) if guild_ids else m.clear_global(),
+    'list': _list_each,
+}
 
 
 async def main() -> None:
@@ -172,53 +255,48 @@ async def main() -> None:
     
     # Sync commands
     sync_parser = subparsers.add_parser('sync', help='Sync commands')
-    sync_parser.add_argument('--guild', type=int, help='Guild ID to sync to (for testing)')
+    sync_parser.add_argument('--guild', type=int, nargs='+', help='Guild ID(s) to sync to (for testing)')
     
     # Clear commands
     clear_parser = subparsers.add_parser('clear', help='Clear commands')
-    clear_parser.add_argument('--guild', type=int, help='Guild ID to clear from')
+    clear_parser.add_argument('--guild', type=int, nargs='+', help='Guild ID(s) to clear from')
     
     # List commands
     list_parser = subparsers.add_parser('list', help='List registered commands')
-    list_parser.add_argument('--guild', type=int, help='Guild ID to list commands from')
+    list_parser.add_argument('--guild', type=int, nargs='+', help='Guild ID(s) to list commands from')
+    
+    parser.add_argument('--actions', help='Comma-separated actions to run in one session, e.g. sync,list')
+    # Own dest: a subcommand's --guild default would otherwise overwrite this one
+    parser.add_argument('--guild', type=int, nargs='+', dest='actions_guild', help='Guild ID(s) used with --actions')
     
     args = parser.parse_args()
+    if args.actions and args.action:
+        parser.error("--actions cannot be combined with a positional action")
+    if args.actions_guild and not args.actions:
+        parser.error("--guild before the action is only used with --actions; pass it after the action")
+    
+    actions = args.actions.split(',') if args.actions else [args.action]
+    guild_ids = args.actions_guild if args.actions else args.guild
+    
+    if not all(action in DISPATCH for action in actions):
+        parser.print_help()
+        return
     
     if not BOT_TOKEN:
         logger.error("❌ Bot token not found!")
         logger.error("Please set DISCORD_BOT_TOKEN environment variable or create .env file")
         sys.exit(1)
     
-    manager = CommandManager(BOT_TOKEN)
-    
     try:
-        if args.action == 'sync':
-            if args.guild:
-                await manager.sync_guild(args.guild)
-            else:
-                await manager.sync_global()
-        
-        elif args.action == 'clear':
-            if args.guild:
-                await manager.clear_guild(args.guild)
-            else:
-                await manager.clear_global()
-        
-        elif args.action == 'list':
-            await manager.list_commands(args.guild)
-        
-        else:
-            parser.print_help()
+        async with CommandManager(BOT_TOKEN) as manager:
+            for action in actions:
+                await DISPATCH[action](manager, guild_ids)
             
     except KeyboardInterrupt:
         logger.info("Operation cancelled by user")
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
 
 
 if __name__ == "__main__":
-    # Handle Windows event loop policy
-    if sys.platform == 'win32':
-        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-    
     asyncio.run(main())
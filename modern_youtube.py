@@ -1,206 +1,485 @@
 """Modern YouTube extractor with 2024-2025 bot detection handling."""
 
 import asyncio
+import functools
 import logging
+import random
+import re
+import threading
+import time
 import aiohttp
-from typing import Optional, Dict, Any, List
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Optional, Dict, Any, Iterator, List, Mapping, Tuple
+from urllib.parse import parse_qs, urlparse
 import yt_dlp
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from config import YTDL_FORMAT_OPTIONS
 
 logger = logging.getLogger(__name__)
 
+_VALIDATE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Linux; Android 11; SM-G973F) AppleWebKit/537.36'
+}
+_RANGE_HEADERS = {'Range': 'bytes=0-0'}
+
+# Static retry policy for transient connect/read failures while validating
+_VALIDATE_ATTEMPTS = 3
+_VALIDATE_RETRY_DELAY = 0.2
+
+# Shared session so URL validation reuses pooled TCP/TLS connections to googlevideo
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Get or create the shared HTTP session for audio URL validation."""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            headers=_VALIDATE_HEADERS,
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300)
+        )
+    return _SESSION
+
+
+async def close_session() -> None:
+    """Close the shared HTTP session (call on shutdown)."""
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+# yt-dlp calls block for seconds; they get their own small pool instead of the default executor
+_YTDLP_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ytdlp')
+
+# yt-dlp walks this fallback chain over one set of formats, so one call covers every format strategy
+_FORMAT_CHAIN = 'bestaudio[ext=webm]/bestaudio[ext=m4a]/bestaudio/worst[ext=webm]/worst[ext=m4a]'
+
+# Enhanced client strategies for 2025 YouTube bot detection, rotated per attempt
+_CLIENT_STRATEGIES: Tuple[Tuple[str, ...], ...] = (
+    ('mweb', 'ios'),                       # Mobile web + iOS (best for bot detection)
+    ('ios', 'android_music'),              # iOS + Android Music
+    ('android_music', 'mweb'),             # Android Music + Mobile web
+    ('mweb',),                             # Mobile web only (most reliable)
+    ('tv_embedded', 'mweb'),               # TV embedded + mobile fallback
+    ('web_safari', 'ios'),                 # Safari + iOS combination
+)
+
+# Classifies yt-dlp errors in one pass; the first keyword in the message decides
+_ERR_RE = re.compile(
+    r"(?P<bot>sign in|bot|captcha|blocked|confirm you)|(?P<unavail>unavailable)|(?P<restricted>restricted|private)",
+    re.IGNORECASE
+)
+
+# yt-dlp searches allowed to run at once
+_SEARCH_CONCURRENCY = 3
+
+# Upper bound (seconds) of the random pause before extracting an uncached URL while others run
+_FIRST_ATTEMPT_JITTER = 2.0
+
+
+# Idle YoutubeDL instances keyed by their (frozen) options, most recently used last.
+# An instance is checked out by one thread at a time, so concurrent calls never share one.
+_YDL_POOL: 'OrderedDict[Any, List[yt_dlp.YoutubeDL]]' = OrderedDict()
+_YDL_POOL_KEYS = 16
+_YDL_IDLE_PER_KEY = 4
+_YDL_POOL_LOCK = threading.Lock()
+
+
+def _freeze(value: Any) -> Any:
+    """Turn nested option dicts/lists into a hashable key."""
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@contextmanager
+def _get_ydl(opts: Dict[str, Any]) -> Iterator[yt_dlp.YoutubeDL]:
+    """Check out a pooled YoutubeDL for these options, creating one only when none is idle."""
+    key = _freeze(opts)
+    with _YDL_POOL_LOCK:
+        idle = _YDL_POOL.get(key)
+        ydl = idle.pop() if idle else None
+    if ydl is None:
+        ydl = yt_dlp.YoutubeDL(dict(opts))
+    
+    try:
+        yield ydl
+    finally:
+        to_close = []
+        with _YDL_POOL_LOCK:
+            idle = _YDL_POOL.setdefault(key, [])
+            _YDL_POOL.move_to_end(key)
+            if len(idle) < _YDL_IDLE_PER_KEY:
+                idle.append(ydl)
+            else:
+                to_close.append(ydl)
+            while len(_YDL_POOL) > _YDL_POOL_KEYS:
+                to_close.extend(_YDL_POOL.popitem(last=False)[1])
+        # Only idle (checked-in) instances are ever evicted, so closing them is safe
+        for old in to_close:
+            old.close()
+
+
+def _blocking_extract(opts: Dict[str, Any], url: str) -> Dict[str, Any]:
+    """Run a yt-dlp extraction on a pooled YoutubeDL instance (called in an executor)."""
+    with _get_ydl(opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+# 11-character video ID from watch, youtu.be, shorts and embed URLs (checked only on YouTube hosts)
+_YT_ID_RE = re.compile(r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])')
+
+
+def _extract_video_id(url: str) -> Optional[str]:
+    """Return the YouTube video ID in a URL, if any."""
+    host = urlparse(url).hostname or ''
+    if host != 'youtu.be' and host != 'youtube.com' and not host.endswith('.youtube.com'):
+        return None
+    match = _YT_ID_RE.search(url)
+    return match[1] if match else None
+
+
+# Freshly signed googlevideo URLs must stay valid at least this long to skip the network check
+_EXPIRE_MARGIN = 30
+
+
+def _is_likely_valid(audio_url: str) -> bool:
+    """Trust a googlevideo URL whose signed ``expire`` timestamp is still comfortably in the future."""
+    parsed = urlparse(audio_url)
+    host = parsed.hostname or ''
+    if host != 'googlevideo.com' and not host.endswith('.googlevideo.com'):
+        return False
+    try:
+        expire = int(parse_qs(parsed.query)['expire'][0])
+    except (KeyError, ValueError):
+        return False
+    return expire > time.time() + _EXPIRE_MARGIN
+
+
+_MISSING = object()
+
+
+class _TTLCache:
+    """Small dict-backed cache whose entries expire after ``ttl`` seconds; the oldest go first when full."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Any, Tuple[float, Any]] = {}
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return default
+        return entry[1]
+    
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __setitem__(self, key: Any, value: Any) -> None:
+        now = time.monotonic()
+        self._data.pop(key, None)
+        if len(self._data) >= self.maxsize:
+            for k in [k for k, (expires, _) in self._data.items() if expires <= now]:
+                del self._data[k]
+            while len(self._data) >= self.maxsize:
+                del self._data[next(iter(self._data))]
+        self._data[key] = (now + self.ttl, value)
+    
+    def pop(self, key: Any, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@dataclass(slots=True)
+class ExtractionResult:
+    """Playable stream details for one extracted video."""
+    url: str
+    title: str = 'Unknown Title'
+    duration: int = 0
+    uploader: str = 'Unknown'
+    webpage_url: str = ''
+    thumbnail: Optional[str] = None
+    id: str = ''
+    extractor: str = 'youtube'
+    format_id: str = 'unknown'
+    
+    @classmethod
+    def from_info(cls, data: Mapping[str, Any], url: str) -> 'ExtractionResult':
+        """Build a result from a yt-dlp info dict."""
+        return cls(
+            url=data['url'],
+            title=data.get('title', 'Unknown Title'),
+            duration=data.get('duration', 0),
+            uploader=data.get('uploader', 'Unknown'),
+            webpage_url=data.get('webpage_url', url),
+            thumbnail=data.get('thumbnail'),
+            id=data.get('id', ''),
+            extractor=data.get('extractor', 'youtube'),
+            format_id=data.get('format_id', 'unknown')
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict view for callers that still expect a yt-dlp style info dict."""
+        return asdict(self)
+
 class ModernYouTubeExtractor:
     """Advanced YouTube extractor with comprehensive fallback strategies."""
     
     def __init__(self):
         self.base_opts = YTDL_FORMAT_OPTIONS.copy()
-        self.extraction_cache = {}  # Short-term URL cache
-        self.failed_urls = set()   # Track recently failed URLs
+        # Signed googlevideo URLs live ~6h, so an hour-old extraction is still playable
+        self.extraction_cache = _TTLCache(maxsize=256, ttl=3600)
+        self.failed_urls = _TTLCache(maxsize=512, ttl=600)  # Recently failed URLs -> True
+        self._search_sem = asyncio.Semaphore(_SEARCH_CONCURRENCY)
+        self._inflight: Dict[str, asyncio.Future] = {}  # Cache key -> extraction in progress
         
-        # Add YouTube cookies support for bot detection bypass
-        cookies_path = os.environ.get('COOKIES_PATH')
-        if cookies_path and os.path.exists(cookies_path):
-            self.base_opts['cookiefile'] = cookies_path
-            logger.info(f"✅ Using YouTube cookies from: {cookies_path}")
+        # Add YouTube cookies support for bot detection bypass; COOKIES_PATHS holds
+        # several files (os.pathsep-separated) so one banned account isn't fatal
+        cookies_paths = os.environ.get('COOKIES_PATHS', os.environ.get('COOKIES_PATH', ''))
+        self._cookie_rotation = [p for p in cookies_paths.split(os.pathsep) if p and os.path.exists(p)]
+        self._cookie_banned = _TTLCache(maxsize=16, ttl=14400)  # Cookie files that hit bot detection
+        if self._cookie_rotation:
+            self.base_opts['cookiefile'] = self._cookie_rotation[0]
+            logger.info(f"✅ Using YouTube cookies from: {', '.join(self._cookie_rotation)}")
         else:
             logger.info("ℹ️ No cookies file found - using cookieless extraction")
         
-    async def extract_with_fallback(self, url: str, max_retries: int = 3) -> Optional[Dict[str, Any]]:
+        # One options dict per client strategy, each with its own extractor_args so
+        # rotating clients never mutates the shared config dict; the cookie is added per attempt
+        youtube_args = self.base_opts.get('extractor_args', {}).get('youtube', {})
+        cookieless_opts = {k: v for k, v in self.base_opts.items() if k != 'cookiefile'}
+        self._opts_per_strategy = [
+            {
+                **cookieless_opts,
+                'format': _FORMAT_CHAIN,
+                'extractor_args': {'youtube': {**youtube_args, 'player_client': list(clients)}},
+            }
+            for clients in _CLIENT_STRATEGIES
+        ]
+        
+    def _pick_cookie(self) -> Optional[str]:
+        """Return the first cookie file not recently flagged by bot detection."""
+        for path in self._cookie_rotation:
+            if path not in self._cookie_banned:
+                return path
+        return None
+    
+    def opts_with_cookie(self) -> Dict[str, Any]:
+        """Copy base_opts, swapping its cookie for the current unbanned one (or none)."""
+        opts = self.base_opts.copy()
+        opts.pop('cookiefile', None)
+        cookie = self._pick_cookie()
+        if cookie:
+            opts['cookiefile'] = cookie
+        return opts
+    
+    async def extract_with_fallback(self, url: str, max_retries: int = 3) -> Optional[ExtractionResult]:
         """Extract with comprehensive error handling for Render constraints."""
         
+        # Key caches by video ID so query-string variants of one video share entries
+        cache_key = _extract_video_id(url) or url
+        
         # Check cache first
-        if url in self.extraction_cache:
-            cached = self.extraction_cache[url]
-            if await self._validate_url(cached.get('url', '')):
-                logger.info(f"Using cached extraction for: {url}")
-                return cached
+        cached = self.extraction_cache.get(cache_key)
+        if cached:
+            logger.info(f"Using cached extraction for: {url}")
+            return cached
         
         # Skip recently failed URLs briefly
-        if url in self.failed_urls:
+        if cache_key in self.failed_urls:
             logger.warning(f"Skipping recently failed URL: {url}")
             return None
         
-        # Try different format strategies
-        format_strategies = [
-            'bestaudio[ext=webm]/bestaudio[ext=m4a]/bestaudio',
-            'bestaudio[ext=webm]',
-            'bestaudio[ext=m4a]', 
-            'worst[ext=webm]/worst[ext=m4a]',
-            'bestaudio',
-        ]
+        # Join an identical extraction that is already running instead of starting another
+        while (pending := self._inflight.get(cache_key)) is not None:
+            logger.info(f"Waiting on in-flight extraction for: {url}")
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # Its owner was cancelled: join whichever waiter took over, or take over ourselves
+        
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = fut
+        try:
+            result = await self._extract_uncached(url, cache_key, max_retries)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception:
+            # Waiters see a plain failed extraction, same as the None return path
+            fut.set_result(None)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(cache_key) is fut:
+                del self._inflight[cache_key]
+    
+    async def _extract_uncached(self, url: str, cache_key: str, max_retries: int) -> Optional[ExtractionResult]:
+        """Run the client strategies and search fallback for a URL missing from the caches."""
+        # Spread out first requests only when other extractions are running; a lone one starts at once
+        if len(self._inflight) > 1:
+            await asyncio.sleep(random.uniform(0, _FIRST_ATTEMPT_JITTER))
         
         for attempt in range(max_retries):
-            for format_str in format_strategies:
-                try:
-                    logger.info(f"Attempt {attempt + 1}/{max_retries}, format: {format_str}")
-                    
-                    # Create strategy-specific options
-                    opts = self.base_opts.copy()
-                    opts['format'] = format_str
-                    
-                    # Add specific client rotation for this attempt
-                    client_order = self._get_client_order(attempt)
-                    opts['extractor_args']['youtube']['player_client'] = client_order
-                    
-                    loop = asyncio.get_event_loop()
-                    
-                    with yt_dlp.YoutubeDL(opts) as ydl:
-                        data = await loop.run_in_executor(
-                            None, 
-                            lambda: ydl.extract_info(url, download=False)
-                        )
-                    
-                    if 'entries' in data:
-                        data = data['entries'][0]
-                    
-                    # Validate extracted data
-                    audio_url = data.get('url')
-                    if not audio_url or 'Invalid' in str(audio_url):
-                        raise Exception("Invalid audio URL extracted")
-                    
-                    # Test URL accessibility with timeout
-                    if not await self._validate_url(audio_url):
-                        raise Exception(f"Audio URL validation failed")
-                    
-                    result = {
-                        'url': audio_url,
-                        'title': data.get('title', 'Unknown Title'),
-                        'duration': data.get('duration', 0),
-                        'uploader': data.get('uploader', 'Unknown'),
-                        'webpage_url': data.get('webpage_url', url),
-                        'thumbnail': data.get('thumbnail'),
-                        'id': data.get('id', ''),
-                        'extractor': data.get('extractor', 'youtube'),
-                        'format_id': data.get('format_id', 'unknown')
-                    }
-                    
-                    # Cache successful extraction briefly
-                    self.extraction_cache[url] = result
-                    
-                    # Clean up failed URLs on success
-                    if url in self.failed_urls:
-                        self.failed_urls.remove(url)
-                    
-                    logger.info(f"✅ Extraction successful: {result['title']}")
-                    return result
-                    
-                except Exception as e:
-                    error_msg = str(e)
-                    logger.warning(f"❌ Format {format_str} failed: {error_msg}")
-                    
-                    # Check for specific error types
-                    if any(keyword in error_msg.lower() for keyword in 
-                           ['sign in', 'bot', 'captcha', 'blocked', 'confirm you\'re not a bot']):
-                        logger.warning("🤖 YouTube bot detection encountered - trying next strategy...")
-                        logger.info("💡 Consider using search terms instead of direct URLs, or add cookies via COOKIES_PATH env var")
-                        continue
-                    elif 'unavailable' in error_msg.lower():
-                        logger.error("❌ Video unavailable, marking as failed")
-                        self.failed_urls.add(url)
-                        return None
-                    elif 'restricted' in error_msg.lower() or 'private' in error_msg.lower():
-                        logger.error("❌ Video is restricted or private")
-                        self.failed_urls.add(url)
-                        return None
-                        return None
-                    else:
-                        # Other errors, continue with next format
-                        continue
+            # Add specific client rotation for this attempt; formats are picked by one chain
+            strategy_opts = self._opts_per_strategy[attempt % len(_CLIENT_STRATEGIES)]
+            cookie = self._pick_cookie()
+            if cookie:
+                strategy_opts = {**strategy_opts, 'cookiefile': cookie}
+            
+            try:
+                result = await self._try_strategy(url, strategy_opts, attempt, max_retries)
+            except Exception as e:
+                match = _ERR_RE.search(str(e))
+                kind = match.lastgroup if match else None
+                
+                # Check for specific error types
+                if kind == 'bot':
+                    logger.warning("🤖 YouTube bot detection encountered - trying next strategy...")
+                    if cookie:
+                        # Bench this cookie so the next attempt rotates to another one
+                        self._cookie_banned[cookie] = True
+                        logger.warning(f"🍪 Cookie file {cookie} flagged, rotating to the next one")
+                    logger.info("💡 Consider using search terms instead of direct URLs, or add cookies via COOKIES_PATH/COOKIES_PATHS env var")
+                elif kind == 'unavail':
+                    logger.error("❌ Video unavailable, marking as failed")
+                    self.failed_urls[cache_key] = True
+                    return None
+                elif kind == 'restricted':
+                    logger.error("❌ Video is restricted or private")
+                    self.failed_urls[cache_key] = True
+                    return None
+            else:
+                # Cache successful extraction briefly
+                self.extraction_cache[cache_key] = result
+                
+                # Clean up failed URLs on success
+                self.failed_urls.pop(cache_key, None)
+                
+                logger.info(f"✅ Extraction successful: {result.title}")
+                return result
             
             # Exponential backoff between retry attempts
             if attempt < max_retries - 1:
-                wait_time = min(2 ** attempt, 10)
-                logger.info(f"Waiting {wait_time}s before retry...")
+                # Full jitter keeps concurrent retries from hitting YouTube in lockstep
+                wait_time = random.uniform(0, min(2 ** attempt, 10))
+                logger.info(f"Waiting {wait_time:.1f}s before retry...")
                 await asyncio.sleep(wait_time)
         
         # All strategies failed
         logger.error(f"All extraction strategies failed for: {url}")
-        self.failed_urls.add(url)
+        self.failed_urls[cache_key] = True
         
         # If this was a URL extraction that failed due to bot detection, try search fallback
-        if 'youtube.com/watch' in url or 'youtu.be/' in url:
+        if _extract_video_id(url):
             logger.warning("🔄 URL extraction failed completely, attempting search fallback...")
             try:
                 # Try to extract title for search as last resort
-                opts = self.base_opts.copy()
+                opts = self.opts_with_cookie()
                 opts['extract_flat'] = True
                 opts['skip_download'] = True
                 # Use minimal options to avoid bot detection
                 opts.pop('extractor_args', None)
                 
-                with yt_dlp.YoutubeDL(opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    if info and info.get('title'):
-                        search_query = info['title']
-                        logger.info(f"🔍 Extracted title for search fallback: {search_query}")
-                        search_result = await self.search_youtube(search_query)
-                        if search_result:
-                            logger.info("✅ Search fallback successful!")
-                            return search_result
+                # Still a blocking network call, so keep it off the event loop
+                loop = asyncio.get_running_loop()
+                info = await loop.run_in_executor(_YTDLP_EXECUTOR, _blocking_extract, opts, url)
+                if info and info.get('title'):
+                    search_query = info['title']
+                    logger.info(f"🔍 Extracted title for search fallback: {search_query}")
+                    search_result = await self.search_youtube(search_query)
+                    if search_result:
+                        logger.info("✅ Search fallback successful!")
+                        return ExtractionResult.from_info(search_result, url)
             except Exception as e:
                 logger.debug(f"Search fallback also failed: {e}")
         
         return None
     
-    def _get_client_order(self, attempt: int) -> List[str]:
-        """Get client order based on attempt number with 2025 bot detection optimizations."""
-        # Enhanced client strategies for 2025 YouTube bot detection
-        client_strategies = [
-            ['mweb', 'ios'],                       # Mobile web + iOS (best for bot detection)
-            ['ios', 'android_music'],              # iOS + Android Music
-            ['android_music', 'mweb'],             # Android Music + Mobile web
-            ['mweb'],                              # Mobile web only (most reliable)
-            ['tv_embedded', 'mweb'],               # TV embedded + mobile fallback
-            ['web_safari', 'ios'],                 # Safari + iOS combination
-        ]
-        return client_strategies[attempt % len(client_strategies)]
+    async def _try_strategy(
+        self,
+        url: str,
+        strategy_opts: Dict[str, Any],
+        attempt: int,
+        max_retries: int
+    ) -> ExtractionResult:
+        """Run one client strategy in the yt-dlp executor and return a validated result."""
+        try:
+            logger.info(f"Attempt {attempt + 1}/{max_retries}, clients: {strategy_opts['extractor_args']['youtube']['player_client']}")
+            
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(_YTDLP_EXECUTOR, _blocking_extract, strategy_opts, url)
+            
+            if 'entries' in data:
+                data = data['entries'][0]
+            
+            # Validate extracted data
+            audio_url = data.get('url')
+            if not audio_url or 'Invalid' in str(audio_url):
+                raise Exception("Invalid audio URL extracted")
+            
+            # Test URL accessibility with timeout
+            if not (_is_likely_valid(audio_url) or await self._validate_url(audio_url)):
+                raise Exception(f"Audio URL validation failed")
+            
+            return ExtractionResult.from_info(data, url)
+            
+        except Exception as e:
+            logger.warning(f"❌ Attempt {attempt + 1} failed: {e}")
+            raise
     
     async def _validate_url(self, audio_url: str, timeout: int = 10) -> bool:
         """Validate that the audio URL is accessible."""
         if not audio_url or not audio_url.startswith('http'):
             return False
         
-        try:
-            timeout_obj = aiohttp.ClientTimeout(total=timeout)
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Linux; Android 11; SM-G973F) AppleWebKit/537.36'
-            }
-            
-            async with aiohttp.ClientSession(timeout=timeout_obj, headers=headers) as session:
-                async with session.head(audio_url) as resp:
+        timeout_obj = aiohttp.ClientTimeout(total=timeout)
+        session = await _get_session()
+        
+        # Connection blips get a few quick fixed-interval retries here instead of
+        # failing the whole format attempt into the exponential backoff loop
+        for attempt in range(_VALIDATE_ATTEMPTS):
+            try:
+                # googlevideo often rejects bare HEAD but serves a one-byte ranged GET
+                async with session.get(audio_url, headers=_RANGE_HEADERS, timeout=timeout_obj) as resp:
                     is_valid = resp.status in [200, 206]  # 206 for partial content
                     if not is_valid:
                         logger.warning(f"URL validation failed with status {resp.status}")
+                    if resp.status == 206:
+                        # Drain the single byte so the connection can go back to the pool
+                        await resp.read()
                     return is_valid
                     
-        except asyncio.TimeoutError:
-            logger.warning("URL validation timed out")
-            return False
-        except Exception as e:
-            logger.warning(f"URL validation error: {e}")
-            return False
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                logger.debug(f"URL validation attempt {attempt + 1}/{_VALIDATE_ATTEMPTS} failed: {e!r}")
+                if attempt + 1 < _VALIDATE_ATTEMPTS:
+                    await asyncio.sleep(_VALIDATE_RETRY_DELAY)
+            except Exception as e:
+                logger.warning(f"URL validation error: {e}")
+                return False
+        
+        logger.warning(f"URL validation gave up after {_VALIDATE_ATTEMPTS} attempts")
+        return False
     
     async def search_youtube(self, query: str, max_results: int = 1) -> Optional[Dict[str, Any]]:
         """Search YouTube with modern extraction."""
@@ -208,23 +487,20 @@ class ModernYouTubeExtractor:
             search_query = f"ytsearch{max_results}:{query}"
             logger.info(f"Searching YouTube: {query}")
             
-            opts = self.base_opts.copy()
+            opts = self.opts_with_cookie()  # Skips cookies that bot detection has flagged
             opts['format'] = 'bestaudio[ext=webm]/bestaudio'
             
-            loop = asyncio.get_event_loop()
-            
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                data = await loop.run_in_executor(
-                    None, 
-                    lambda: ydl.extract_info(search_query, download=False)
-                )
+            # Caps concurrent yt-dlp searches (e.g. parallel query variations)
+            async with self._search_sem:
+                data = await asyncio.to_thread(_blocking_extract, opts, search_query)
             
             if 'entries' in data and len(data['entries']) > 0:
                 result = data['entries'][0]
                 logger.info(f"Found: {result.get('title', 'Unknown')}")
                 
                 # Pre-validate the result
-                if await self._validate_url(result.get('url', '')):
+                audio_url = result.get('url', '')
+                if _is_likely_valid(audio_url) or await self._validate_url(audio_url):
                     return result
                 else:
                     logger.warning("Search result URL validation failed")
@@ -237,71 +513,36 @@ class ModernYouTubeExtractor:
             logger.error(f"Search failed: {e}")
             return None
     
-    def cleanup_cache(self):
-        """Clean up old cache entries."""
-        # Simple cleanup - in production, you'd implement TTL
-        if len(self.extraction_cache) > 50:
-            # Keep only the most recent 25 entries
-            items = list(self.extraction_cache.items())
-            self.extraction_cache = dict(items[-25:])
-        
-        # Clean up failed URLs after some time
-        if len(self.failed_urls) > 100:
-            self.failed_urls.clear()
-
     async def smart_extract_or_search(self, url_or_query: str) -> Optional[Dict[str, Any]]:
         """Smart extraction that tries direct URL first, then falls back to search."""
         
-        # Check if it's a YouTube URL
-        if 'youtube.com/watch' in url_or_query or 'youtu.be/' in url_or_query:
+        # Check if it's a YouTube URL (watch, youtu.be, shorts or embed)
+        video_id = _extract_video_id(url_or_query) if url_or_query.startswith(('http://', 'https://')) else None
+        if video_id:
             logger.info(f"Attempting direct URL extraction: {url_or_query}")
             
             # Try direct extraction first but with reduced retries for faster fallback
             result = await self.extract_with_fallback(url_or_query, max_retries=2)
             if result:
-                return result
+                return result.to_dict()
             
-            # If direct extraction failed, immediately try search fallback
+            # If direct extraction failed, immediately try search fallback by video ID;
+            # no extra yt-dlp round-trip just to learn the title
             logger.warning("🔄 Direct URL failed, attempting search fallback immediately...")
+            search_queries = [
+                video_id,  # Sometimes direct video ID search works
+                f"site:youtube.com {video_id}",  # Site-specific search
+            ]
             
-            # Extract video ID for title-based search
-            video_id = None
-            if 'youtube.com/watch?v=' in url_or_query:
-                video_id = url_or_query.split('v=')[1].split('&')[0]
-            elif 'youtu.be/' in url_or_query:
-                video_id = url_or_query.split('youtu.be/')[1].split('?')[0]
-            
-            if video_id:
-                # Try searching by video ID first (often works better)
-                search_queries = [
-                    video_id,  # Sometimes direct video ID search works
-                    f"site:youtube.com {video_id}",  # Site-specific search
-                ]
-                
-                for search_query in search_queries:
-                    try:
-                        logger.info(f"🔍 Trying search: {search_query}")
-                        result = await self.search_youtube(search_query)
-                        if result:
-                            logger.info("✅ Search fallback successful!")
-                            return result
-                    except Exception as e:
-                        logger.debug(f"Search query failed: {search_query} - {e}")
-            
-            # If video ID search fails, try extracting title with minimal options
-            try:
-                opts = {'quiet': True, 'extract_flat': True, 'skip_download': True}
-                with yt_dlp.YoutubeDL(opts) as ydl:
-                    info = ydl.extract_info(url_or_query, download=False)
-                    if info and info.get('title'):
-                        search_query = info['title']
-                        logger.info(f"🔍 Extracted title for search: {search_query}")
-                        result = await self.search_youtube(search_query)
-                        if result:
-                            logger.info("✅ Title-based search successful!")
-                            return result
-            except Exception as e:
-                logger.debug(f"Title extraction failed: {e}")
+            for search_query in search_queries:
+                try:
+                    logger.info(f"🔍 Trying search: {search_query}")
+                    result = await self.search_youtube(search_query)
+                    if result:
+                        logger.info("✅ Search fallback successful!")
+                        return result
+                except Exception as e:
+                    logger.debug(f"Search query failed: {search_query} - {e}")
             
             # Last resort: suggest the user try a different approach
             logger.error("❌ All extraction methods failed")
@@ -316,57 +557,58 @@ class MultiSourcePlayer:
     """Multi-source fallback player for when YouTube fails."""
     
     def __init__(self):
-        self.extractor = ModernYouTubeExtractor()
+        # Share the global extractor so both paths see the same caches
+        self.extractor = get_modern_extractor()
+        self._negative = _TTLCache(maxsize=1024, ttl=300)  # Normalized queries that found nothing
     
     async def get_playable_source(self, query: str) -> Optional[Dict[str, Any]]:
         """Get playable source with multiple fallback strategies."""
+        key = ' '.join(query.lower().split())
+        if key in self._negative:
+            logger.info(f"Skipping recently failed query: {query}")
+            return None
         
         # Strategy 1: Direct URL if provided
         if query.startswith(('http://', 'https://')):
             result = await self.extractor.extract_with_fallback(query)
             if result:
-                return result
+                return result.to_dict()
         
-        # Strategy 2: Search for exact query
-        result = await self.extractor.search_youtube(query)
-        if result:
-            return result
-        
-        # Strategy 3: Try search variations
+        # Strategy 2: Search for the exact query and its variations at once; first hit wins
         search_variations = [
+            query,
             f"{query} audio",
             f"{query} official", 
             f"{query} music",
             f"{query} full"
         ]
+        tasks = [asyncio.create_task(self.extractor.search_youtube(v)) for v in search_variations]
         
-        for variation in search_variations:
-            try:
-                result = await self.extractor.search_youtube(variation)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    result = await next_done
+                except Exception as e:
+                    logger.debug(f"Search variation failed: {e}")
+                    continue
                 if result:
-                    logger.info(f"Found using variation: {variation}")
+                    logger.info(f"Found using search: {result.get('title', 'Unknown')}")
                     return result
-            except Exception as e:
-                logger.debug(f"Variation {variation} failed: {e}")
-                continue
+        finally:
+            for task in tasks:
+                task.cancel()
         
         logger.error(f"All strategies failed for query: {query}")
+        self._negative[key] = True
         return None
 
 # Global instances
-_modern_extractor = None
-_multi_source_player = None
-
+@functools.lru_cache(maxsize=1)
 def get_modern_extractor() -> ModernYouTubeExtractor:
     """Get or create the global modern extractor instance."""
-    global _modern_extractor
-    if _modern_extractor is None:
-        _modern_extractor = ModernYouTubeExtractor()
-    return _modern_extractor
+    return ModernYouTubeExtractor()
 
+@functools.lru_cache(maxsize=1)
 def get_multi_source_player() -> MultiSourcePlayer:
     """Get or create the global multi-source player instance."""
-    global _multi_source_player
-    if _multi_source_player is None:
-        _multi_source_player = MultiSourcePlayer()
-    return _multi_source_player
+    return MultiSourcePlayer()
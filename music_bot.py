@@ -1,19 +1,31 @@
 """Main Discord Music Bot implementation."""
 
 import asyncio
+import functools
+import time
 import discord
+import discord.opus
 from discord.ext import commands
 import logging
-from typing import Dict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
 
-from config import BOT_PREFIX, BOT_TOKEN
+from config import BOT_PREFIX, BOT_TOKEN, IDLE_DISCONNECT_DELAY, STATE_IDLE_TTL, STATE_SWEEP_INTERVAL
 from music_queue import MusicQueue
 from music_commands import MusicCommands
 from register_commands import setup_commands, CommandRegistrar, SlashCommandErrorHandler
 from ytdl_source import YTDLSource
-from utils import create_song_embed
+from utils import NOW_PLAYING_COLOR, create_song_embed
 from ffmpeg_utils import setup_ffmpeg
-from music_controls import create_music_controls
+from music_controls import create_music_controls, create_queue_controls, create_volume_controls
+from alternative_extractor import close_session as close_fallback_session
+from modern_youtube import close_session as close_validation_session
+
+# PyNaCl is only needed for voice; check_voice_dependencies reports it if missing
+try:
+    import nacl
+except ImportError:
+    nacl = None
 
 # Import web server functions
 try:
@@ -32,21 +44,20 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
 def check_voice_dependencies() -> bool:
-    """Check if all voice dependencies are available."""
+    """Check if all voice dependencies are available (the opus dlopen only runs once)."""
     missing_deps = []
     
     # Check PyNaCl
-    try:
-        import nacl
-        logger.info(f"✅ PyNaCl version: {nacl.__version__}")
-    except ImportError:
+    if nacl is not None:
+        logger.info("✅ PyNaCl version: %s", nacl.__version__)
+    else:
         missing_deps.append("PyNaCl")
         logger.error("❌ PyNaCl not found - voice encryption will not work")
     
     # Check opus
     try:
-        import discord.opus
         if discord.opus.is_loaded():
             logger.info("✅ Opus library loaded successfully")
         else:
@@ -66,19 +77,38 @@ def check_voice_dependencies() -> bool:
                         logger.error("❌ Failed to load Opus library with both libopus.so.0 and opus")
             except Exception as e:
                 missing_deps.append("Opus")
-                logger.error(f"❌ Error loading Opus: {e}")
+                logger.error("❌ Error loading Opus: %s", e)
     except Exception as e:
         missing_deps.append("Opus")
-        logger.error(f"❌ Error checking Opus: {e}")
+        logger.error("❌ Error checking Opus: %s", e)
     
     if missing_deps:
-        logger.error(f"❌ Missing voice dependencies: {', '.join(missing_deps)}")
+        logger.error("❌ Missing voice dependencies: %s", ', '.join(missing_deps))
         logger.error("💡 Install with: pip install discord.py[voice]")
         return False
     
     return True
 
 
+@dataclass(slots=True)
+class GuildState:
+    """Per-guild playback state."""
+    queue: MusicQueue = field(default_factory=MusicQueue)
+    player_task: Optional[asyncio.Task] = None  # Player loop, woken by track_done when a track finishes
+    track_done: asyncio.Event = field(default_factory=asyncio.Event)
+    np_message: Optional[discord.Message] = None  # Live "Now Playing" message with controls
+    idle_timer: Optional[asyncio.TimerHandle] = None  # Pending alone-in-channel disconnect
+    last_active: float = field(default_factory=time.monotonic)
+    
+    def discard(self) -> None:
+        """Cancel the guild's player loop and timers."""
+        if self.player_task:
+            self.player_task.cancel()
+        if self.idle_timer:
+            self.idle_timer.cancel()
+        self.np_message = None
+
+
 class MusicBot(commands.Bot):
     """Enhanced Discord Music Bot with organized structure."""
     
@@ -90,8 +120,12 @@ class MusicBot(commands.Bot):
         
         super().__init__(command_prefix=BOT_PREFIX, intents=intents)
         
-        # Global music queues for each guild
-        self.music_queues: Dict[int, MusicQueue] = {}
+        # Queue, player loop and timers for each guild, behind one lookup
+        self.guild_states: Dict[int, GuildState] = {}
+        self._sweep_task: Optional[asyncio.Task] = None
+        
+        # Presence is fixed, so build it once and reuse it on every reconnect
+        self._activity = discord.Activity(type=discord.ActivityType.listening, name=f"{BOT_PREFIX}help | /help")
         
         # Command registrar for slash commands
         self.command_registrar: CommandRegistrar = None
@@ -111,13 +145,66 @@ class MusicBot(commands.Bot):
         
         # Set up slash command error handler
         self.tree.error(SlashCommandErrorHandler.on_app_command_error)
+        
+        # Register the persistent control views so buttons on older messages keep working
+        create_music_controls(self)
+        create_queue_controls(self)
+        create_volume_controls(self)
+        
+        # Periodically forget guilds that stopped using the bot
+        self._sweep_task = asyncio.create_task(self._sweep_idle_states())
+    
+    async def close(self) -> None:
+        """Close shared HTTP sessions before shutting down the bot."""
+        if self._sweep_task:
+            self._sweep_task.cancel()
+        await close_fallback_session()
+        await close_validation_session()
+        await super().close()
+    
+    def get_state(self, guild_id: int) -> GuildState:
+        """Get or create the playback state for guild."""
+        state = self.guild_states.get(guild_id)
+        if state is None:
+            state = self.guild_states[guild_id] = GuildState()
+            logger.info("Created new music queue for guild %s", guild_id)
+        else:
+            state.last_active = time.monotonic()
+        return state
+    
+    def evict_idle_states(self, now: Optional[float] = None) -> int:
+        """Drop state for guilds idle past STATE_IDLE_TTL with nothing queued or connected."""
+        cutoff = (now if now is not None else time.monotonic()) - STATE_IDLE_TTL
+        stale = []
+        for guild_id, state in self.guild_states.items():
+            if state.last_active > cutoff or not state.queue.is_empty or state.player_task:
+                continue
+            guild = self.get_guild(guild_id)
+            if guild and guild.voice_client:
+                continue
+            stale.append(guild_id)
+        
+        for guild_id in stale:
+            self.guild_states.pop(guild_id).discard()
+        return len(stale)
+    
+    async def _sweep_idle_states(self) -> None:
+        """Evict idle guild state every STATE_SWEEP_INTERVAL seconds."""
+        while True:
+            await asyncio.sleep(STATE_SWEEP_INTERVAL)
+            evicted = self.evict_idle_states()
+            if evicted:
+                logger.info("Dropped idle state for %s guilds", evicted)
+    
+    def end_session(self, guild_id: int) -> 'asyncio.Future[None]':
+        """Clear the guild's queue and forget its controls message; await the result to finish the release."""
+        state = self.get_state(guild_id)
+        state.np_message = None
+        return state.queue.clear_async()
     
     def get_queue(self, guild_id: int) -> MusicQueue:
         """Get or create music queue for guild."""
-        if guild_id not in self.music_queues:
-            self.music_queues[guild_id] = MusicQueue()
-            logger.info(f"Created new music queue for guild {guild_id}")
-        return self.music_queues[guild_id]
+        return self.get_state(guild_id).queue
     
     def update_web_status(self, current_song: str = None) -> None:
         """Update web server status."""
@@ -126,142 +213,136 @@ class MusicBot(commands.Bot):
                 connected=self.is_ready(),
                 guilds=len(self.guilds),
                 voice_connected=any(guild.voice_client and guild.voice_client.is_connected() for guild in self.guilds),
-                queue_size=sum(len(queue) for queue in self.music_queues.values()),
+                queue_size=sum(state.queue.size for state in self.guild_states.values()),
                 current_song=current_song
             )
         except Exception as e:
-            logger.debug(f"Failed to update web status: {e}")
+            logger.debug("Failed to update web status: %s", e)
     
-    async def play_next(self, ctx: commands.Context) -> None:
-        """Play the next song in queue."""
-        queue = self.get_queue(ctx.guild.id)
-        player = queue.get_next()
+    def start_player(
+        self,
+        guild_id: int,
+        send: Callable[..., Awaitable[discord.Message]],
+        announce_after: Optional[asyncio.Future] = None
+    ) -> None:
+        """Start the guild's player loop unless one is already running.
         
-        if player:
-            def after_playing(error):
-                if error:
-                    logger.error(f'Player error: {error}')
-                
-                # Schedule next song
-                asyncio.run_coroutine_threadsafe(self.play_next(ctx), self.loop)
-            
-            # Get the actual playable audio source
-            audio_source = player.get_playable_source()
-            ctx.voice_client.play(audio_source, after=after_playing)
-            
-            # Send now playing message with interactive controls
-            embed = create_song_embed(player, "🎵 Now Playing", discord.Color.blue())
-            view = create_music_controls(self, ctx.guild.id)
-            message = await ctx.send(embed=embed, view=view)
-            view.message = message
-            
-            # Update web status
-            self.update_web_status(current_song=player.title)
-        else:
-            logger.info(f"No more songs in queue for guild {ctx.guild.id}")
-            self.update_web_status()
+        The first "Now Playing" message waits for announce_after (e.g. the
+        "Added to Queue" send), so the two messages keep their order.
+        """
+        state = self.get_state(guild_id)
+        if state.player_task is None or state.player_task.done():
+            state.player_task = asyncio.create_task(self._player_loop(guild_id, send, announce_after))
     
-    async def play_next_interaction(self, interaction: discord.Interaction) -> None:
-        """Play the next song in queue (for slash commands)."""
-        queue = self.get_queue(interaction.guild.id)
-        player = queue.get_next()
+    async def _player_loop(
+        self,
+        guild_id: int,
+        send: Callable[..., Awaitable[discord.Message]],
+        announce_after: Optional[asyncio.Future] = None
+    ) -> None:
+        """Play queued songs back to back, waiting on the guild's event between tracks."""
+        loop = asyncio.get_running_loop()
+        state = self.get_state(guild_id)
+        track_done = state.track_done
+        queue = state.queue
         
-        if player:
-            def after_playing(error):
-                if error:
-                    logger.error(f'Player error: {error}')
-                
-                # Create a dummy context for the next song
-                # This is a workaround since interactions don't have the same context structure
-                channel = interaction.channel
-                asyncio.run_coroutine_threadsafe(
-                    self._play_next_from_interaction(interaction.guild.id, channel), 
-                    self.loop
-                )
-            
-            interaction.guild.voice_client.play(player.get_playable_source(), after=after_playing)
-            
-            # Send now playing message if we haven't responded yet
-            embed = create_song_embed(player, "🎵 Now Playing", discord.Color.blue())
-            view = create_music_controls(self, interaction.guild.id)
+        def after_playing(error):
+            if error:
+                logger.error("Player error: %s", error)
             
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(embed=embed, view=view)
-                    # Get the message object for the view
-                    message = await interaction.original_response()
-                    view.message = message
-                else:
-                    message = await interaction.followup.send(embed=embed, view=view)
-                    view.message = message
-            except discord.NotFound:
-                # Interaction may have expired, send to channel directly
-                message = await interaction.channel.send(embed=embed, view=view)
-                view.message = message
+            # Called from the audio thread; just wake the player loop
+            loop.call_soon_threadsafe(track_done.set)
+        
+        try:
+            while True:
+                guild = self.get_guild(guild_id)
+                voice_client = guild.voice_client if guild else None
+                if not voice_client or not voice_client.is_connected():
+                    break
                 
-            # Update web status
-            self.update_web_status(current_song=player.title)
-        else:
-            logger.info(f"No more songs in queue for guild {interaction.guild.id}")
-            self.update_web_status()
+                player = queue.get_next()
+                if not player:
+                    logger.info("No more songs in queue for guild %s", guild_id)
+                    self.update_web_status()
+                    break
+                
+                track_done.clear()
+                voice_client.play(player.get_playable_source(), after=after_playing)
+                
+                if announce_after is not None:
+                    # Audio is already playing; only the message waits. Its caller handles any error
+                    await asyncio.wait((announce_after,))
+                    announce_after = None
+                await self._announce_now_playing(guild_id, player, send)
+                await track_done.wait()
+        except Exception as e:
+            logger.error("❌ Player loop error in guild %s: %s", guild_id, e)
+        finally:
+            if state.player_task is asyncio.current_task():
+                state.player_task = None
+                state.np_message = None  # The next session posts a fresh controls message
     
-    async def _play_next_from_interaction(self, guild_id: int, channel) -> None:
-        """Helper method to continue playing songs after interaction-initiated playback."""
-        guild = self.get_guild(guild_id)
-        if not guild or not guild.voice_client:
-            return
-            
-        queue = self.get_queue(guild_id)
-        player = queue.get_next()
+    async def _announce_now_playing(self, guild_id: int, player, send: Callable[..., Awaitable[discord.Message]]) -> None:
+        """Show the track on the guild's controls message and update web status."""
+        embed = create_song_embed(player, "🎵 Now Playing", NOW_PLAYING_COLOR)
+        try:
+            await self._show_now_playing(guild_id, embed, send)
+        except discord.HTTPException as e:
+            logger.warning("Could not send now playing message: %s", e)
         
-        if player:
-            def after_playing(error):
-                if error:
-                    logger.error(f'Player error: {error}')
-                
-                asyncio.run_coroutine_threadsafe(
-                    self._play_next_from_interaction(guild_id, channel), 
-                    self.loop
-                )
-            
-            guild.voice_client.play(player.get_playable_source(), after=after_playing)
-            
-            # Send now playing message
-            embed = create_song_embed(player, "🎵 Now Playing", discord.Color.blue())
-            view = create_music_controls(self, guild_id)
-            message = await channel.send(embed=embed, view=view)
-            view.message = message
+        # Update web status
+        self.update_web_status(current_song=player.title)
+    
+    async def _show_now_playing(self, guild_id: int, embed: discord.Embed, send: Callable[..., Awaitable[discord.Message]]) -> None:
+        """Edit the guild's live controls message, falling back to sending a new one."""
+        state = self.get_state(guild_id)
+        if state.np_message is not None:
+            try:
+                await state.np_message.edit(embed=embed)
+                return
+            except discord.HTTPException as e:
+                # Deleted, no longer editable (e.g. archived thread) or not permitted
+                logger.debug("Could not edit now playing message, sending a new one: %s", e)
+                state.np_message = None
+        
+        state.np_message = await send(embed=embed, view=create_music_controls(self))
     
     async def on_ready(self) -> None:
         """Bot ready event."""
-        logger.info(f'{self.user} has connected to Discord!')
-        logger.info(f'Bot is in {len(self.guilds)} guilds')
+        logger.info("%s has connected to Discord!", self.user)
+        logger.info("Bot is in %s guilds", len(self.guilds))
         
         # Update web server status
         update_bot_status(
             connected=True,
             guilds=len(self.guilds),
             voice_connected=any(guild.voice_client for guild in self.guilds),
-            queue_size=sum(len(queue) for queue in self.music_queues.values())
+            queue_size=sum(state.queue.size for state in self.guild_states.values())
         )
         
         # Set bot status
-        activity = discord.Activity(type=discord.ActivityType.listening, name=f"{BOT_PREFIX}help | /help")
-        await self.change_presence(activity=activity)
+        await self.change_presence(activity=self._activity)
         
         # Log command registration stats
         if self.command_registrar:
             stats = self.command_registrar.get_command_stats()
-            logger.info(f"Command stats: {stats}")
+            logger.info("Command stats: %s", stats)
     
     async def on_guild_join(self, guild: discord.Guild) -> None:
         """Called when bot joins a new guild."""
-        logger.info(f"Joined new guild: {guild.name} ({guild.id}) with {guild.member_count} members")
+        logger.info("Joined new guild: %s (%s) with %s members", guild.name, guild.id, guild.member_count)
         
         # Sync commands to new guild for immediate availability
         if self.command_registrar:
             await self.command_registrar.on_guild_join(guild)
     
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        """Called when bot is removed from a guild."""
+        state = self.guild_states.pop(guild.id, None)
+        if state:
+            state.discard()
+        logger.info("Removed from guild %s, dropped its music state", guild.id)
+    
     async def on_command_error(self, ctx: commands.Context, error: commands.CommandError) -> None:
         """Handle command errors."""
         if isinstance(error, commands.CommandNotFound):
@@ -273,27 +354,57 @@ class MusicBot(commands.Bot):
             # Already handled in the command, so we don't need to send another message
             pass
         else:
-            logger.error(f"Command error in {ctx.command}: {error}")
+            logger.error("Command error in %s: %s", ctx.command, error)
             await ctx.send(f"❌ An error occurred: {str(error)}")
     
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState) -> None:
         """Handle voice state updates."""
         # If bot is alone in voice channel, disconnect after a delay
-        if member == self.user:
+        if member.bot:
             return
         
+        # Most events are for guilds or channels the bot isn't playing in
         voice_client = member.guild.voice_client
-        if voice_client and len(voice_client.channel.members) == 1:  # Only bot left
-            logger.info(f"Bot alone in voice channel {voice_client.channel.name}, scheduling disconnect")
-            await asyncio.sleep(60)  # Wait 1 minute
-            
-            # Check again if still alone
-            if voice_client.is_connected() and len(voice_client.channel.members) == 1:
-                queue = self.get_queue(member.guild.id)
-                queue.clear()
-                await voice_client.disconnect()
-                logger.info(f"Disconnected from {voice_client.channel.name} due to inactivity")
-
+        if voice_client is None:
+            return
+        if before.channel != voice_client.channel and after.channel != voice_client.channel:
+            return
+        
+        guild_id = member.guild.id
+        if not any(not m.bot for m in voice_client.channel.members):  # Only bots left
+            state = self.get_state(guild_id)
+            if state.idle_timer is None:
+                logger.info("Bot alone in voice channel %s, scheduling disconnect", voice_client.channel.name)
+                state.idle_timer = asyncio.get_running_loop().call_later(
+                    IDLE_DISCONNECT_DELAY, self._on_idle_timer, guild_id
+                )
+        else:
+            # Someone is back (or the bot left); drop any pending disconnect
+            state = self.guild_states.get(guild_id)
+            if state and state.idle_timer:
+                state.idle_timer.cancel()
+                state.idle_timer = None
+    
+    def _on_idle_timer(self, guild_id: int) -> None:
+        """Timer callback: hand the disconnect off to a task."""
+        # get_state would revive a state that was evicted or removed, and refresh its last_active
+        state = self.guild_states.get(guild_id)
+        if state is None:
+            return
+        state.idle_timer = None
+        asyncio.create_task(self._idle_disconnect(guild_id))
+    
+    async def _idle_disconnect(self, guild_id: int) -> None:
+        """Disconnect from voice if the bot is still alone in its channel."""
+        guild = self.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        
+        # Check again if still alone
+        if voice_client and voice_client.is_connected() and not any(not m.bot for m in voice_client.channel.members):
+            release = self.end_session(guild_id)
+            await voice_client.disconnect()
+            logger.info("Disconnected from %s due to inactivity", voice_client.channel.name)
+            await release
 
 def main() -> None:
     """Main function to run the bot."""
@@ -322,7 +433,7 @@ def main() -> None:
     except discord.LoginFailure:
         logger.error("❌ Invalid bot token!")
     except Exception as e:
-        logger.error(f"❌ An error occurred: {e}")
+        logger.error("❌ An error occurred: %s", e)
 
 
 if __name__ == "__main__":
@@ -1,31 +1,62 @@
 """Music-related commands for the Discord Music Bot."""
 
 import asyncio
-import discord
 from discord.ext import commands
 import logging
 from typing import TYPE_CHECKING
 
 from ytdl_source import YTDLSource
-from utils import create_embed, create_song_embed, create_queue_embed, create_search_results_embed
+from utils import NOW_PLAYING_COLOR, create_embed, normalize_url, playback_state, create_song_embed, create_queue_embed, create_search_results_embed
 from music_controls import create_music_controls, create_queue_controls, create_volume_controls
-from youtube_helper import create_youtube_blocked_embed, get_troubleshooting_tips
+from youtube_helper import create_youtube_blocked_embed, get_troubleshooting_tips, is_bot_detection_error
 
 if TYPE_CHECKING:
     from music_bot import MusicBot
 
 logger = logging.getLogger(__name__)
 
+# Prefix commands listed by !help
+HELP_COMMANDS = (
+    ("!play <url/query>", "Play music from YouTube URL or search"),
+    ("!pause", "Pause the current song"),
+    ("!resume", "Resume the paused song"),
+    ("!stop", "Stop music and clear queue"),
+    ("!skip", "Skip the current song"),
+    ("!queue", "Show the current queue with controls"),
+    ("!clear", "Clear the music queue"),
+    ("!shuffle", "Shuffle the queue"),
+    ("!volume <0-100>", "Change playback volume"),
+    ("!loop", "Toggle loop mode"),
+    ("!nowplaying", "Show currently playing song with controls"),
+    ("!controls", "Show music control panel"),
+    ("!volume_panel", "Show volume control panel"),
+    ("!search <query>", "Search YouTube for songs"),
+    ("!join", "Join your voice channel"),
+    ("!leave", "Leave the voice channel"),
+)
+
 
 class MusicCommands(commands.Cog):
     """Music playback commands."""
     
+    # Commands that work without the user being in a voice channel
+    _NO_VOICE_REQUIRED = frozenset({'help', 'search', 'queue'})
+    
     def __init__(self, bot: 'MusicBot'):
         self.bot = bot
+        
+        # Help text never changes, so build the embed once and resend it
+        self._help_embed = create_embed(
+            "🎵 Music Bot Commands",
+            "Here are all available commands:"
+        )
+        for command, description in HELP_COMMANDS:
+            self._help_embed.add_field(name=command, value=description, inline=False)
+        self._help_embed.set_footer(text="Supports YouTube videos and shorts!")
     
     async def cog_before_invoke(self, ctx: commands.Context) -> None:
         """Check if user is in voice channel before most commands."""
-        if ctx.command.name not in ['help', 'search', 'queue']:
+        if ctx.command.name not in self._NO_VOICE_REQUIRED:
             if not ctx.author.voice:
                 await ctx.send("❌ You need to be in a voice channel!")
                 raise commands.CheckFailure("User not in voice channel")
@@ -46,10 +77,10 @@ class MusicCommands(commands.Cog):
     async def leave_voice(self, ctx: commands.Context) -> None:
         """Leave the voice channel."""
         if ctx.voice_client:
-            queue = self.bot.get_queue(ctx.guild.id)
-            queue.clear()
+            release = self.bot.end_session(ctx.guild.id)
             await ctx.voice_client.disconnect()
             await ctx.send("👋 Disconnected from voice channel!")
+            await release
         else:
             await ctx.send("❌ Bot is not in a voice channel!")
 
@@ -64,10 +95,11 @@ class MusicCommands(commands.Cog):
         
         async with ctx.typing():
             try:
-                # Check if it's a URL or search query
-                if query.startswith(('http://', 'https://')):
+                # Check if it's a URL (bare hosts like youtu.be/... included) or search query
+                url = normalize_url(query)
+                if url:
                     # Direct URL
-                    player = await YTDLSource.from_url(query, loop=self.bot.loop, stream=True)
+                    player = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True)
                 else:
                     # Search query
                     search_result = await YTDLSource.search_youtube(query, loop=self.bot.loop)
@@ -84,17 +116,20 @@ class MusicCommands(commands.Cog):
                 embed = create_song_embed(player, "🎵 Added to Queue")
                 embed.add_field(name="Position in Queue", value=str(queue.size), inline=True)
                     
-                await ctx.send(embed=embed)
-                
-                # Start playing if nothing is currently playing
-                if not ctx.voice_client.is_playing():
-                    await self.bot.play_next(ctx)
+                # Post the embed while playback starts; the player's "Now Playing" waits for it
+                send_task = asyncio.create_task(ctx.send(embed=embed))
+                try:
+                    # Start playing if nothing is currently playing
+                    if not ctx.voice_client.is_playing():
+                        self.bot.start_player(ctx.guild.id, ctx.send, announce_after=send_task)
+                finally:
+                    await send_task
                     
             except Exception as e:
-                logger.error(f"Error playing music: {e}")
+                logger.error("Error playing music: %s", e)
                 
                 # Check if it's a YouTube bot detection error
-                if "Sign in to confirm you're not a bot" in str(e) or "bot" in str(e).lower():
+                if is_bot_detection_error(e):
                     embed = create_youtube_blocked_embed()
                     await ctx.send(embed=embed)
                 else:
@@ -103,7 +138,7 @@ class MusicCommands(commands.Cog):
     @commands.command(name='pause')
     async def pause_music(self, ctx: commands.Context) -> None:
         """Pause the current song."""
-        if ctx.voice_client and ctx.voice_client.is_playing():
+        if playback_state(ctx.voice_client) == 'playing':
             ctx.voice_client.pause()
             await ctx.send("⏸️ Music paused!")
         else:
@@ -112,7 +147,7 @@ class MusicCommands(commands.Cog):
     @commands.command(name='resume')
     async def resume_music(self, ctx: commands.Context) -> None:
         """Resume the paused song."""
-        if ctx.voice_client and ctx.voice_client.is_paused():
+        if playback_state(ctx.voice_client) == 'paused':
             ctx.voice_client.resume()
             await ctx.send("▶️ Music resumed!")
         else:
@@ -122,17 +157,17 @@ class MusicCommands(commands.Cog):
     async def stop_music(self, ctx: commands.Context) -> None:
         """Stop the music and clear queue."""
         if ctx.voice_client:
-            queue = self.bot.get_queue(ctx.guild.id)
-            queue.clear()
+            release = self.bot.end_session(ctx.guild.id)
             ctx.voice_client.stop()
             await ctx.send("⏹️ Music stopped and queue cleared!")
+            await release
         else:
             await ctx.send("❌ Nothing is playing!")
 
     @commands.command(name='skip', aliases=['next'])
     async def skip_music(self, ctx: commands.Context) -> None:
         """Skip the current song."""
-        if ctx.voice_client and ctx.voice_client.is_playing():
+        if playback_state(ctx.voice_client) == 'playing':
             ctx.voice_client.stop()  # This will trigger the after callback to play next
             await ctx.send("⏭️ Song skipped!")
         else:
@@ -143,24 +178,24 @@ class MusicCommands(commands.Cog):
         """Show the current music queue with interactive controls."""
         queue = self.bot.get_queue(ctx.guild.id)
         
-        embed = create_queue_embed(queue)
-        view = create_queue_controls(self.bot, ctx.guild.id)
-        message = await ctx.send(embed=embed, view=view)
-        view.message = message
+        embed = queue.cached_embed(create_queue_embed)
+        view = create_queue_controls(self.bot)
+        await ctx.send(embed=embed, view=view)
 
     @commands.command(name='clear')
     async def clear_queue(self, ctx: commands.Context) -> None:
         """Clear the music queue."""
         queue = self.bot.get_queue(ctx.guild.id)
-        queue.clear()
+        release = queue.clear_async()
         await ctx.send("🗑️ Queue cleared!")
+        await release
 
     @commands.command(name='shuffle')
     async def shuffle_queue(self, ctx: commands.Context) -> None:
         """Shuffle the music queue."""
         queue = self.bot.get_queue(ctx.guild.id)
-        if queue.queue:
-            queue.shuffle()
+        if queue.size:
+            await queue.shuffle_async()
             await ctx.send("🔀 Queue shuffled!")
         else:
             await ctx.send("❌ Queue is empty!")
@@ -206,13 +241,12 @@ class MusicCommands(commands.Cog):
             await ctx.send("❌ Nothing is playing!")
             return
         
-        embed = create_song_embed(queue.current, "🎵 Now Playing", discord.Color.blue())
+        embed = create_song_embed(queue.current, "🎵 Now Playing", NOW_PLAYING_COLOR)
         embed.add_field(name="Loop", value="🔁 Enabled" if queue.loop_mode else "▶️ Disabled", inline=True)
         
         # Add music controls to the now playing message
-        view = create_music_controls(self.bot, ctx.guild.id)
-        message = await ctx.send(embed=embed, view=view)
-        view.message = message
+        view = create_music_controls(self.bot)
+        await ctx.send(embed=embed, view=view)
 
     @commands.command(name='controls')
     async def show_controls(self, ctx: commands.Context) -> None:
@@ -230,9 +264,8 @@ class MusicCommands(commands.Cog):
                 inline=False
             )
         
-        view = create_music_controls(self.bot, ctx.guild.id)
-        message = await ctx.send(embed=embed, view=view)
-        view.message = message
+        view = create_music_controls(self.bot)
+        await ctx.send(embed=embed, view=view)
 
     @commands.command(name='volume_panel', aliases=['vol_panel'])
     async def volume_panel(self, ctx: commands.Context) -> None:
@@ -259,9 +292,8 @@ class MusicCommands(commands.Cog):
                     inline=True
                 )
         
-        view = create_volume_controls(self.bot, ctx.guild.id)
-        message = await ctx.send(embed=embed, view=view)
-        view.message = message
+        view = create_volume_controls(self.bot)
+        await ctx.send(embed=embed, view=view)
 
     @commands.command(name='search')
     async def search_youtube(self, ctx: commands.Context, *, query: str) -> None:
@@ -278,38 +310,10 @@ class MusicCommands(commands.Cog):
                 await ctx.send(embed=embed)
                 
             except Exception as e:
-                logger.error(f"Error searching YouTube: {e}")
+                logger.error("Error searching YouTube: %s", e)
                 await ctx.send(f"❌ Error searching: {str(e)}")
 
     @commands.command(name='help')
     async def help_command(self, ctx: commands.Context) -> None:
         """Show help message with all commands."""
-        embed = create_embed(
-            "🎵 Music Bot Commands",
-            "Here are all available commands:"
-        )
-        
-        commands_list = [
-            ("!play <url/query>", "Play music from YouTube URL or search"),
-            ("!pause", "Pause the current song"),
-            ("!resume", "Resume the paused song"),
-            ("!stop", "Stop music and clear queue"),
-            ("!skip", "Skip the current song"),
-            ("!queue", "Show the current queue with controls"),
-            ("!clear", "Clear the music queue"),
-            ("!shuffle", "Shuffle the queue"),
-            ("!volume <0-100>", "Change playback volume"),
-            ("!loop", "Toggle loop mode"),
-            ("!nowplaying", "Show currently playing song with controls"),
-            ("!controls", "Show music control panel"),
-            ("!volume_panel", "Show volume control panel"),
-            ("!search <query>", "Search YouTube for songs"),
-            ("!join", "Join your voice channel"),
-            ("!leave", "Leave the voice channel"),
-        ]
-        
-        for command, description in commands_list:
-            embed.add_field(name=command, value=description, inline=False)
-        
-        embed.set_footer(text="Supports YouTube videos and shorts!")
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._help_embed)
@@ -1,24 +1,75 @@
 """Music queue management for the Discord Music Bot."""
 
+import asyncio
 import random
-from typing import List, Optional, Any
+from collections import deque
+from typing import Callable, Deque, List, MutableSequence, Optional, Any
 import logging
 
+# NumPy is optional; when installed, very large queues are permuted in C
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
+# Queues at least this long are shuffled on a worker thread by shuffle_async()
+SHUFFLE_OFFLOAD_THRESHOLD = 1000
+# Queues at least this long are shuffled with NumPy when it is available
+NUMPY_SHUFFLE_THRESHOLD = 2048
+
+_np_rng = np.random.default_rng() if np is not None else None
+
+
+def _fisher_yates(seq: MutableSequence[Any]) -> None:
+    """Shuffle seq in place, mapping one 64-bit draw per swap onto [0, i] (Lemire)."""
+    n = len(seq)
+    if n < 2:
+        return
+    # Draw every swap's random bits in one call, read back as 64-bit words
+    draws = memoryview(random.randbytes(n * 8)).cast('Q')
+    for i in range(n - 1, 0, -1):
+        j = (draws[i] * (i + 1)) >> 64
+        seq[i], seq[j] = seq[j], seq[i]
+
+
+def _shuffle_songs(songs: List[Any]) -> None:
+    """Shuffle a list of songs in place, with NumPy's PCG64 for very long lists."""
+    if _np_rng is not None and len(songs) >= NUMPY_SHUFFLE_THRESHOLD:
+        order = _np_rng.permutation(len(songs)).tolist()
+        songs[:] = map(songs.__getitem__, order)
+    else:
+        _fisher_yates(songs)
+
 
 class MusicQueue:
     """Queue for managing music playback."""
     
+    __slots__ = ('queue', '_current', '_loop_mode', '_size', '_version', '_embed_cache', '_embed_version')
+    
     def __init__(self) -> None:
-        self.queue: List[Any] = []
-        self.current: Optional[Any] = None
-        self.loop_mode: bool = False
+        self.queue: Deque[Any] = deque()
+        self._current: Optional[Any] = None
+        self._loop_mode: bool = False
+        self._size: int = 0  # Kept in step with self.queue by every mutating method
+        self._version: int = 0  # Bumped by every mutating method
+        self._embed_cache: Any = None
+        self._embed_version: int = -1  # _version the cached embed was built from
         
     def add(self, song: Any) -> None:
         """Add song to queue."""
         self.queue.append(song)
+        self._size += 1
+        self._version += 1
         logger.info(f"Added song to queue: {song.title}")
+    
+    def add_next(self, song: Any) -> None:
+        """Add song to the front of the queue so it plays next."""
+        self.queue.appendleft(song)
+        self._size += 1
+        self._version += 1
+        logger.info(f"Added song to play next: {song.title}")
         
     def get_next(self) -> Optional[Any]:
         """Get next song from queue."""
@@ -27,7 +78,9 @@ class MusicQueue:
             return self.current
             
         if self.queue:
-            self.current = self.queue.pop(0)
+            self.current = self.queue.popleft()
+            self._size -= 1
+            self._version += 1
             logger.info(f"Playing next song: {self.current.title}")
             return self.current
         
@@ -36,19 +89,58 @@ class MusicQueue:
         
     def clear(self) -> None:
         """Clear the queue."""
-        logger.info(f"Clearing queue with {len(self.queue)} songs")
-        self.queue.clear()
+        self._detach()
+    
+    def clear_async(self) -> 'asyncio.Future[None]':
+        """Clear the queue now; the returned future resolves once the removed songs are released."""
+        songs = self._detach()
+        loop = asyncio.get_running_loop()
+        if songs:
+            # Dropping the last reference to a queued source kills its FFmpeg process
+            return loop.run_in_executor(None, songs.clear)
+        done = loop.create_future()
+        done.set_result(None)
+        return done
+    
+    def _detach(self) -> Deque[Any]:
+        """Swap in an empty queue and return the old one."""
+        logger.info(f"Clearing queue with {self._size} songs")
+        songs, self.queue = self.queue, deque()
+        self._size = 0
+        self._version += 1
         self.current = None
+        return songs
         
     def shuffle(self) -> None:
         """Shuffle the queue."""
-        random.shuffle(self.queue)
-        logger.info(f"Shuffled queue with {len(self.queue)} songs")
+        # deque indexing is O(n) away from the ends, so shuffle a list copy
+        songs = list(self.queue)
+        _shuffle_songs(songs)
+        self.queue = deque(songs)
+        self._version += 1
+        logger.info(f"Shuffled queue with {self._size} songs")
+    
+    async def shuffle_async(self) -> None:
+        """Shuffle the queue, on a worker thread when it is large."""
+        loop = asyncio.get_running_loop()
+        while self._size >= SHUFFLE_OFFLOAD_THRESHOLD:
+            version = self._version
+            songs = list(self.queue)
+            await loop.run_in_executor(None, _shuffle_songs, songs)
+            # Only swap in the result if nothing touched the queue meanwhile
+            if version == self._version:
+                self.queue = deque(songs)
+                self._version += 1
+                logger.info(f"Shuffled queue with {self._size} songs")
+                return
+        self.shuffle()
         
     def skip(self) -> Optional[Any]:
         """Skip current song."""
         if self.queue:
-            self.current = self.queue.pop(0)
+            self.current = self.queue.popleft()
+            self._size -= 1
+            self._version += 1
             logger.info(f"Skipped to: {self.current.title}")
             return self.current
         
@@ -56,12 +148,39 @@ class MusicQueue:
         logger.info("No more songs in queue")
         return None
     
+    @property
+    def current(self) -> Optional[Any]:
+        """The song that is playing, if any."""
+        return self._current
+    
+    @current.setter
+    def current(self, song: Optional[Any]) -> None:
+        self._current = song
+        self._version += 1  # Shown in the queue embed
+    
+    @property
+    def loop_mode(self) -> bool:
+        """Whether the current song repeats."""
+        return self._loop_mode
+    
+    @loop_mode.setter
+    def loop_mode(self, enabled: bool) -> None:
+        self._loop_mode = enabled
+        self._version += 1  # Shown in the queue embed
+    
+    def cached_embed(self, build: Callable[['MusicQueue'], Any]) -> Any:
+        """Return build(self), reusing the last result until the queue changes."""
+        if self._embed_version != self._version:
+            self._embed_cache = build(self)
+            self._embed_version = self._version
+        return self._embed_cache
+    
     @property
     def size(self) -> int:
         """Get the current queue size."""
-        return len(self.queue)
+        return self._size
     
     @property
     def is_empty(self) -> bool:
         """Check if queue is empty."""
-        return len(self.queue) == 0 and self.current is None
+        return self._size == 0 and self.current is None
@@ -15,9 +15,9 @@ from discord.ext import commands
 
 from config import BOT_PREFIX
 from ytdl_source import YTDLSource
-from utils import create_embed, create_song_embed, create_queue_embed, create_search_results_embed
+from utils import NOW_PLAYING_COLOR, create_embed, normalize_url, playback_state, create_song_embed, create_queue_embed, create_search_results_embed
 from music_controls import create_music_controls, create_queue_controls, create_volume_controls
-from youtube_helper import create_youtube_blocked_embed, get_troubleshooting_tips
+from youtube_helper import create_youtube_blocked_embed, get_troubleshooting_tips, is_bot_detection_error
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,9 @@ logger = logging.getLogger(__name__)
 class MusicSlashCommands(commands.Cog):
     """Slash command implementations for the music bot."""
     
+    # Commands that work without the user being in a voice channel
+    _NO_VOICE_REQUIRED = frozenset({'help', 'search', 'queue'})
+    
     def __init__(self, bot: commands.Bot):
         self.bot = bot
     
@@ -34,7 +37,7 @@ class MusicSlashCommands(commands.Cog):
     
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         """Check if user is in voice channel for most commands."""
-        if interaction.command and interaction.command.name not in ['help', 'search', 'queue']:
+        if interaction.command and interaction.command.name not in self._NO_VOICE_REQUIRED:
             if not interaction.user.voice:
                 await interaction.response.send_message("❌ You need to be in a voice channel!", ephemeral=True)
                 return False
@@ -49,21 +52,24 @@ class MusicSlashCommands(commands.Cog):
             
         channel = interaction.user.voice.channel
         
+        # Voice handshakes can take longer than the interaction deadline
+        await interaction.response.defer()
+        
         if interaction.guild.voice_client is not None:
             await interaction.guild.voice_client.move_to(channel)
         else:
             await channel.connect()
             
-        await interaction.response.send_message(f"🎵 Connected to **{channel.name}**!")
+        await interaction.followup.send(f"🎵 Connected to **{channel.name}**!")
 
     @app_commands.command(name="leave", description="Leave the voice channel")
     async def slash_leave(self, interaction: discord.Interaction) -> None:
         """Leave the voice channel."""
         if interaction.guild.voice_client:
-            queue = self.bot.get_queue(interaction.guild.id)
-            queue.clear()
+            release = self.bot.end_session(interaction.guild.id)
             await interaction.guild.voice_client.disconnect()
             await interaction.response.send_message("👋 Disconnected from voice channel!")
+            await release
         else:
             await interaction.response.send_message("❌ Bot is not in a voice channel!", ephemeral=True)
 
@@ -83,10 +89,11 @@ class MusicSlashCommands(commands.Cog):
         queue = self.bot.get_queue(interaction.guild.id)
         
         try:
-            # Check if it's a URL or search query
-            if query.startswith(('http://', 'https://')):
+            # Check if it's a URL (bare hosts like youtu.be/... included) or search query
+            url = normalize_url(query)
+            if url:
                 # Direct URL
-                player = await YTDLSource.from_url(query, loop=self.bot.loop, stream=True)
+                player = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True)
             else:
                 # Search query
                 search_result = await YTDLSource.search_youtube(query, loop=self.bot.loop)
@@ -103,17 +110,20 @@ class MusicSlashCommands(commands.Cog):
             embed = create_song_embed(player, "🎵 Added to Queue")
             embed.add_field(name="Position in Queue", value=str(queue.size), inline=True)
                 
-            await interaction.followup.send(embed=embed)
-            
-            # Start playing if nothing is currently playing
-            if not interaction.guild.voice_client.is_playing():
-                await self.bot.play_next_interaction(interaction)
+            # Post the embed while playback starts; the player's "Now Playing" waits for it
+            send_task = asyncio.create_task(interaction.followup.send(embed=embed))
+            try:
+                # Start playing if nothing is currently playing
+                if not interaction.guild.voice_client.is_playing():
+                    self.bot.start_player(interaction.guild.id, interaction.channel.send, announce_after=send_task)
+            finally:
+                await send_task
                 
         except Exception as e:
             logger.error(f"Error playing music: {e}")
             
             # Check if it's a YouTube bot detection error
-            if "Sign in to confirm you're not a bot" in str(e) or "bot" in str(e).lower():
+            if is_bot_detection_error(e):
                 embed = create_youtube_blocked_embed()
                 await interaction.followup.send(embed=embed)
             else:
@@ -122,7 +132,7 @@ class MusicSlashCommands(commands.Cog):
     @app_commands.command(name="pause", description="Pause the current song")
     async def slash_pause(self, interaction: discord.Interaction) -> None:
         """Pause the current song."""
-        if interaction.guild.voice_client and interaction.guild.voice_client.is_playing():
+        if playback_state(interaction.guild.voice_client) == 'playing':
             interaction.guild.voice_client.pause()
             await interaction.response.send_message("⏸️ Music paused!")
         else:
@@ -131,7 +141,7 @@ class MusicSlashCommands(commands.Cog):
     @app_commands.command(name="resume", description="Resume the paused song")
     async def slash_resume(self, interaction: discord.Interaction) -> None:
         """Resume the paused song."""
-        if interaction.guild.voice_client and interaction.guild.voice_client.is_paused():
+        if playback_state(interaction.guild.voice_client) == 'paused':
             interaction.guild.voice_client.resume()
             await interaction.response.send_message("▶️ Music resumed!")
         else:
@@ -141,17 +151,17 @@ class MusicSlashCommands(commands.Cog):
     async def slash_stop(self, interaction: discord.Interaction) -> None:
         """Stop the music and clear queue."""
         if interaction.guild.voice_client:
-            queue = self.bot.get_queue(interaction.guild.id)
-            queue.clear()
+            release = self.bot.end_session(interaction.guild.id)
             interaction.guild.voice_client.stop()
             await interaction.response.send_message("⏹️ Music stopped and queue cleared!")
+            await release
         else:
             await interaction.response.send_message("❌ Nothing is playing!", ephemeral=True)
 
     @app_commands.command(name="skip", description="Skip the current song")
     async def slash_skip(self, interaction: discord.Interaction) -> None:
         """Skip the current song."""
-        if interaction.guild.voice_client and interaction.guild.voice_client.is_playing():
+        if playback_state(interaction.guild.voice_client) == 'playing':
             interaction.guild.voice_client.stop()  # This will trigger the after callback to play next
             await interaction.response.send_message("⏭️ Song skipped!")
         else:
@@ -162,28 +172,26 @@ class MusicSlashCommands(commands.Cog):
         """Show the current music queue with interactive controls."""
         queue = self.bot.get_queue(interaction.guild.id)
         
-        embed = create_queue_embed(queue)
-        view = create_queue_controls(self.bot, interaction.guild.id)
+        embed = queue.cached_embed(create_queue_embed)
+        view = create_queue_controls(self.bot)
         await interaction.response.send_message(embed=embed, view=view)
-        
-        # Get the message object for the view
-        message = await interaction.original_response()
-        view.message = message
 
     @app_commands.command(name="clear", description="Clear the music queue")
     async def slash_clear(self, interaction: discord.Interaction) -> None:
         """Clear the music queue."""
         queue = self.bot.get_queue(interaction.guild.id)
-        queue.clear()
+        release = queue.clear_async()
         await interaction.response.send_message("🗑️ Queue cleared!")
+        await release
 
     @app_commands.command(name="shuffle", description="Shuffle the music queue")
     async def slash_shuffle(self, interaction: discord.Interaction) -> None:
         """Shuffle the music queue."""
         queue = self.bot.get_queue(interaction.guild.id)
-        if queue.queue:
-            queue.shuffle()
-            await interaction.response.send_message("🔀 Queue shuffled!")
+        if queue.size:
+            await interaction.response.defer()
+            await queue.shuffle_async()
+            await interaction.followup.send("🔀 Queue shuffled!")
         else:
             await interaction.response.send_message("❌ Queue is empty!", ephemeral=True)
 
@@ -226,15 +234,11 @@ class MusicSlashCommands(commands.Cog):
             await interaction.response.send_message("❌ Nothing is playing!", ephemeral=True)
             return
         
-        embed = create_song_embed(queue.current, "🎵 Now Playing", discord.Color.blue())
+        embed = create_song_embed(queue.current, "🎵 Now Playing", NOW_PLAYING_COLOR)
         embed.add_field(name="Loop", value="🔁 Enabled" if queue.loop_mode else "▶️ Disabled", inline=True)
         
-        view = create_music_controls(self.bot, interaction.guild.id)
+        view = create_music_controls(self.bot)
         await interaction.response.send_message(embed=embed, view=view)
-        
-        # Get the message object for the view
-        message = await interaction.original_response()
-        view.message = message
 
     @app_commands.command(name="controls", description="Show music control panel")
     async def slash_controls(self, interaction: discord.Interaction) -> None:
@@ -252,12 +256,8 @@ class MusicSlashCommands(commands.Cog):
                 inline=False
             )
         
-        view = create_music_controls(self.bot, interaction.guild.id)
+        view = create_music_controls(self.bot)
         await interaction.response.send_message(embed=embed, view=view)
-        
-        # Get the message object for the view
-        message = await interaction.original_response()
-        view.message = message
 
     @app_commands.command(name="volume_panel", description="Show volume control panel")
     async def slash_volume_panel(self, interaction: discord.Interaction) -> None:
@@ -284,12 +284,8 @@ class MusicSlashCommands(commands.Cog):
                     inline=True
                 )
         
-        view = create_volume_controls(self.bot, interaction.guild.id)
+        view = create_volume_controls(self.bot)
         await interaction.response.send_message(embed=embed, view=view)
-        
-        # Get the message object for the view
-        message = await interaction.original_response()
-        view.message = message
 
     @app_commands.command(name="search", description="Search YouTube and show results")
     @app_commands.describe(query="Search query")
@@ -12,6 +12,7 @@ from config import BOT_TOKEN, FFMPEG_OPTIONS, FFMPEG_OPUS_OPTIONS
 from ytdl_source import YTDLSource
 from ffmpeg_utils import setup_ffmpeg, ffmpeg_manager
 from music_controls import create_music_controls
+from music_queue import MusicQueue
 
 # Setup logging
 logging.basicConfig(
@@ -33,20 +34,15 @@ class AudioTestBot(discord.Client):
         # Simple queue system for testing
         self.current_player = None
         
-    def get_queue(self, guild_id: int):
-        """Mock queue method for testing."""
-        class MockQueue:
-            def __init__(self):
-                self.current = None
-                self.queue = []
-                self.loop_mode = False
-            
-            def clear(self):
-                self.queue.clear()
-                
-        mock_queue = MockQueue()
-        mock_queue.current = self.current_player
-        return mock_queue
+    def get_queue(self, guild_id: int) -> MusicQueue:
+        """Throwaway queue holding just the test player, for the control buttons."""
+        queue = MusicQueue()
+        queue.current = self.current_player
+        return queue
+    
+    def end_session(self, guild_id: int) -> 'asyncio.Future[None]':
+        """Stop-button hook; the test bot keeps no per-guild session to drop."""
+        return self.get_queue(guild_id).clear_async()
         
     async def on_ready(self):
         """Bot ready event."""
@@ -177,9 +173,8 @@ class AudioTestBot(discord.Client):
             )
             
             # Add simple controls
-            view = create_music_controls(self, message.guild.id)
-            response = await message.channel.send(embed=embed, view=view)
-            view.message = response
+            view = create_music_controls(self)
+            await message.channel.send(embed=embed, view=view)
             
             logger.info(f"Started playing: {player.title}")
             
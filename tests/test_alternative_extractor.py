@@ -0,0 +1,43 @@
+import asyncio
+
+import alternative_extractor
+from alternative_extractor import AlternativeExtractor
+
+
+def test_lookups_for_one_video_never_overlap(monkeypatch):
+    running = []
+    overlaps = []
+
+    async def lookup(video_id, session):
+        overlaps.append(len(running))
+        running.append(video_id)
+        await asyncio.sleep(0.01)
+        running.remove(video_id)
+        return None  # Failed lookups leave nothing cached, so every caller looks up again
+
+    async def get_session():
+        return None
+
+    monkeypatch.setattr(alternative_extractor, "_get_session", get_session)
+    monkeypatch.setattr(AlternativeExtractor, "_lookup_metadata", staticmethod(lookup))
+    monkeypatch.setattr(alternative_extractor, "_NEGCACHE", {})
+
+    async def run():
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        first = [asyncio.create_task(AlternativeExtractor.extract_video_info(url)) for _ in range(2)]
+        await asyncio.sleep(0.015)  # The first lookup is done and the second caller holds the lock
+        alternative_extractor._NEGCACHE.clear()
+        await asyncio.gather(*first, AlternativeExtractor.extract_video_info(url))
+
+    asyncio.run(run())
+    assert overlaps == [0, 0, 0]
+    assert not alternative_extractor._INFO_LOCKS
+
+
+def test_cached_info_is_copied(monkeypatch):
+    monkeypatch.setattr(alternative_extractor, "_INFO_CACHE", {})
+    alternative_extractor._cache_info("dQw4w9WgXcQ", {"title": "Song"})
+
+    info = asyncio.run(AlternativeExtractor.extract_video_info("https://youtu.be/dQw4w9WgXcQ"))
+    info["title"] = "Changed"
+    assert alternative_extractor._INFO_CACHE["dQw4w9WgXcQ"][1]["title"] == "Song"
@@ -0,0 +1,19 @@
+from config import _parse_env
+
+
+def test_parse_env_basic():
+    data = b"# comment\nDISCORD_BOT_TOKEN=abc123\n\nCOOKIES_PATH = /tmp/cookies.txt  \r\n"
+    assert _parse_env(data) == {
+        "DISCORD_BOT_TOKEN": "abc123",
+        "COOKIES_PATH": "/tmp/cookies.txt",
+    }
+
+
+def test_parse_env_quotes_and_empty():
+    data = b"A=\"quoted value\"\nB='single'\nC=\nD=\"\"\n"
+    assert _parse_env(data) == {"A": "quoted value", "B": "single", "C": "", "D": ""}
+
+
+def test_parse_env_skips_invalid_lines():
+    data = b"not a pair\n=missing_key\nKEY=\nNEXT=1\n"
+    assert _parse_env(data) == {"KEY": "", "NEXT": "1"}
@@ -0,0 +1,90 @@
+import io
+import json
+import os
+
+import ffmpeg_utils
+from ffmpeg_utils import FFmpegManager
+
+
+def _fake_binary(tmp_path, name):
+    path = tmp_path / name
+    path.write_text("#!/bin/sh\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_which_results_are_cached(tmp_path, monkeypatch):
+    ffmpeg = _fake_binary(tmp_path, "ffmpeg")
+    cache = tmp_path / "cache" / "ffmpeg_paths.json"
+    monkeypatch.setattr(ffmpeg_utils, "_PATHS_CACHE", cache)
+    monkeypatch.setattr(ffmpeg_utils.shutil, "which", lambda name: ffmpeg if name == "ffmpeg" else None)
+
+    assert FFmpegManager().check_ffmpeg_installation()
+    assert json.loads(cache.read_text())["ffmpeg"] == ffmpeg
+
+    # A fresh process reuses the cache without walking PATH
+    monkeypatch.setattr(ffmpeg_utils.shutil, "which", lambda name: None)
+    manager = FFmpegManager()
+    assert manager.check_ffmpeg_installation()
+    assert manager.ffmpeg_path == ffmpeg
+
+    # A replaced binary invalidates the entry
+    os.utime(ffmpeg, (0, 0))
+    assert not FFmpegManager().check_ffmpeg_installation()
+
+
+def test_selftest_cache_keyed_on_version(tmp_path, monkeypatch):
+    cache = tmp_path / "ffmpeg_selftest.json"
+    monkeypatch.setattr(ffmpeg_utils, "_SELFTEST_CACHE", cache)
+    monkeypatch.delenv("RMUSICO_FFMPEG_SELFTEST_FORCE", raising=False)
+    cache.write_text(json.dumps({"version": "6.1", "pcm_ok": True, "opus_ok": False}))
+
+    assert ffmpeg_utils._cached_selftest("6.1") == {"pcm": True, "opus": False}
+    assert ffmpeg_utils._cached_selftest("7.0") is None
+
+    monkeypatch.setenv("RMUSICO_FFMPEG_SELFTEST_FORCE", "1")
+    assert ffmpeg_utils._cached_selftest("6.1") is None
+
+
+def test_optimal_options_string_form():
+    manager = FFmpegManager()
+    opts = manager.get_optimal_ffmpeg_options()
+    assert opts["pcm"]["options"] == "-vn"
+    argv = manager.get_optimal_ffmpeg_options(as_argv=True)
+    assert argv["opus"]["options"][:3] == ("-vn", "-c:a", "libopus")
+    assert opts["opus"]["before_options"].split() == list(argv["opus"]["before_options"])
+
+
+def test_version_is_memoized(tmp_path, monkeypatch):
+    ffmpeg = _fake_binary(tmp_path, "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "_PATHS_CACHE", tmp_path / "ffmpeg_paths.json")
+    monkeypatch.setattr(ffmpeg_utils.shutil, "which", lambda name: ffmpeg if name == "ffmpeg" else None)
+
+    calls = []
+
+    class FakePopen:
+        def __init__(self, cmd, **kwargs):
+            calls.append(cmd)
+            self.stdout = io.StringIO("ffmpeg version 6.1.1 Copyright (c) 2000-2023\nbuilt with gcc\n")
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            pass
+
+        def kill(self):
+            pass
+
+        def wait(self, timeout=None):
+            return 0
+
+    monkeypatch.setattr(ffmpeg_utils.subprocess, "Popen", FakePopen)
+    manager = FFmpegManager()
+    assert manager.get_ffmpeg_version() == "6.1.1"
+    assert manager.get_ffmpeg_version() == "6.1.1"
+    assert len(calls) == 1
+
+    # The next process picks the version up from the path cache
+    assert FFmpegManager().get_ffmpeg_version() == "6.1.1"
+    assert len(calls) == 1
@@ -0,0 +1,170 @@
+import asyncio
+import os
+
+import modern_youtube
+from modern_youtube import _TTLCache
+
+
+def test_ttl_cache_expiry_and_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(modern_youtube.time, "monotonic", lambda: now[0])
+
+    cache = _TTLCache(maxsize=2, ttl=10)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert "a" in cache and cache.get("b") == 2
+
+    # Full: the oldest entry makes room for the new one
+    cache["c"] = 3
+    assert "a" not in cache and len(cache) == 2
+
+    now[0] += 11
+    assert cache.get("b") is None
+    assert cache.pop("c") is None
+
+
+def test_error_classification():
+    def kind(msg):
+        m = modern_youtube._ERR_RE.search(msg)
+        return m.lastgroup if m else None
+
+    assert kind("Sign in to confirm you're not a bot") == "bot"
+    assert kind("ERROR: [youtube] abc: Video unavailable") == "unavail"
+    assert kind("Private video") == "restricted"
+    assert kind("Requested format is not available") is None
+
+
+def test_extract_video_id_variants():
+    for url in [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s",
+        "https://youtu.be/dQw4w9WgXcQ?si=abc",
+        "https://youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    ]:
+        assert modern_youtube._extract_video_id(url) == "dQw4w9WgXcQ"
+    assert modern_youtube._extract_video_id("https://example.com/song.mp3") is None
+    assert modern_youtube._extract_video_id("https://example.com/watch?v=dQw4w9WgXcQ") is None
+    assert modern_youtube._extract_video_id("https://www.youtube.com/watch?xv=dQw4w9WgXcQ") is None
+    assert modern_youtube._extract_video_id("https://www.youtube.com/watch?t=5&v=dQw4w9WgXcQ") == "dQw4w9WgXcQ"
+
+
+def test_youtubedl_instances_are_pooled(monkeypatch):
+    monkeypatch.setattr(modern_youtube, "_YDL_POOL", modern_youtube.OrderedDict())
+    monkeypatch.setattr(modern_youtube, "_YDL_POOL_KEYS", 1)
+    opts = {"quiet": True, "extractor_args": {"youtube": {"player_client": ["mweb"]}}}
+
+    with modern_youtube._get_ydl(opts) as first:
+        # Checked-out instances are never handed to a second caller
+        with modern_youtube._get_ydl(dict(opts)) as second:
+            assert second is not first
+    with modern_youtube._get_ydl(dict(opts)) as again:
+        assert again in (first, second)
+
+    with modern_youtube._get_ydl({**opts, "format": "bestaudio"}):
+        pass
+    assert len(modern_youtube._YDL_POOL) == 1
+
+
+def test_fresh_googlevideo_urls_skip_validation():
+    import time
+
+    fresh = f"https://rr3---sn-abc.googlevideo.com/videoplayback?expire={int(time.time()) + 3600}&ei=x"
+    stale = f"https://rr3---sn-abc.googlevideo.com/videoplayback?expire={int(time.time()) + 5}"
+    assert modern_youtube._is_likely_valid(fresh)
+    assert not modern_youtube._is_likely_valid(stale)
+    assert not modern_youtube._is_likely_valid("https://example.com/a.mp3?expire=99999999999")
+    assert not modern_youtube._is_likely_valid("https://evilgooglevideo.com/videoplayback?expire=99999999999")
+
+
+def test_cookie_rotation_skips_banned(tmp_path, monkeypatch):
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    first.write_text("")
+    second.write_text("")
+    paths = os.pathsep.join([str(first), str(tmp_path / "missing.txt"), str(second)])
+    monkeypatch.setenv("COOKIES_PATHS", paths)
+
+    extractor = modern_youtube.ModernYouTubeExtractor()
+    assert extractor._cookie_rotation == [str(first), str(second)]
+    assert extractor._pick_cookie() == str(first)
+
+    extractor._cookie_banned[str(first)] = True
+    assert extractor._pick_cookie() == str(second)
+    assert extractor.opts_with_cookie()["cookiefile"] == str(second)
+
+    extractor._cookie_banned[str(second)] = True
+    assert extractor._pick_cookie() is None
+    assert "cookiefile" not in extractor.opts_with_cookie()
+
+
+def test_extraction_result_from_info():
+    info = {"url": "https://rr1---sn.googlevideo.com/videoplayback", "title": "Song", "id": "abc"}
+    result = modern_youtube.ExtractionResult.from_info(info, "https://youtu.be/abc")
+
+    assert result.title == "Song" and result.uploader == "Unknown"
+    assert result.webpage_url == "https://youtu.be/abc"
+    assert result.to_dict()["url"] == info["url"]
+    assert not hasattr(result, "__dict__")
+
+
+def test_concurrent_extractions_share_one_run(monkeypatch):
+    extractor = modern_youtube.ModernYouTubeExtractor()
+    calls = []
+
+    async def fake_extract(url, cache_key, max_retries):
+        calls.append(cache_key)
+        await asyncio.sleep(0.01)
+        return modern_youtube.ExtractionResult(url="https://example.com/audio", id=cache_key)
+
+    monkeypatch.setattr(extractor, "_extract_uncached", fake_extract)
+
+    async def run():
+        return await asyncio.gather(
+            extractor.extract_with_fallback("https://youtu.be/dQw4w9WgXcQ"),
+            extractor.extract_with_fallback("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=5"),
+        )
+
+    first, second = asyncio.run(run())
+    assert calls == ["dQw4w9WgXcQ"]
+    assert first is second
+    assert not extractor._inflight
+
+
+def test_one_waiter_takes_over_a_cancelled_extraction(monkeypatch):
+    extractor = modern_youtube.ModernYouTubeExtractor()
+    calls = []
+
+    async def fake_extract(url, cache_key, max_retries):
+        calls.append(cache_key)
+        await asyncio.sleep(0.01)
+        return modern_youtube.ExtractionResult(url="https://example.com/audio", id=cache_key)
+
+    monkeypatch.setattr(extractor, "_extract_uncached", fake_extract)
+
+    async def run():
+        url = "https://youtu.be/dQw4w9WgXcQ"
+        owner = asyncio.create_task(extractor.extract_with_fallback(url))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(extractor.extract_with_fallback(url)) for _ in range(3)]
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(run())
+    assert calls == ["dQw4w9WgXcQ"] * 2  # The cancelled run plus a single takeover
+    assert results[0] is results[1] is results[2]
+    assert not extractor._inflight
+
+
+def test_lone_extraction_starts_without_jitter(monkeypatch):
+    extractor = modern_youtube.ModernYouTubeExtractor()
+    jitters = []
+
+    async def fake_strategy(url, opts, attempt, max_retries):
+        return modern_youtube.ExtractionResult(url="https://example.com/audio", title="Song")
+
+    monkeypatch.setattr(extractor, "_try_strategy", fake_strategy)
+    monkeypatch.setattr(modern_youtube.random, "uniform", lambda a, b: jitters.append(b) or 0)
+
+    result = asyncio.run(extractor.extract_with_fallback("https://youtu.be/dQw4w9WgXcQ"))
+    assert result.title == "Song"
+    assert jitters == []
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+
+import discord
+
+from music_bot import MusicBot
+
+
+class DummySong:
+    def __init__(self, title):
+        self.title = title
+        self.duration = 60
+        self.uploader = "test"
+        self.thumbnail = None
+
+    def get_playable_source(self):
+        return self.title
+
+
+class DummyVoiceClient:
+    def __init__(self):
+        self.played = []
+
+    def is_connected(self):
+        return True
+
+    def play(self, source, after):
+        self.played.append(source)
+        # discord.py calls `after` from its audio thread once the track ends
+        threading.Thread(target=after, args=(None,)).start()
+
+
+class DummyMessage:
+    def __init__(self, log):
+        self.log = log
+
+    async def edit(self, **kwargs):
+        self.log.append(("edit", kwargs["embed"].description))
+
+
+class DummyGuild:
+    def __init__(self, voice_client):
+        self.id = 1
+        self.voice_client = voice_client
+
+
+def test_player_loop_plays_queue_in_order(monkeypatch):
+    async def run():
+        bot = MusicBot()
+        voice_client = DummyVoiceClient()
+        monkeypatch.setattr(bot, "get_guild", lambda guild_id: DummyGuild(voice_client))
+
+        queue = bot.get_queue(1)
+        for title in ("one", "two", "three"):
+            queue.add(DummySong(title))
+
+        log = []
+
+        async def send(**kwargs):
+            log.append(("send", kwargs["embed"].description))
+            return DummyMessage(log)
+
+        bot.start_player(1, send)
+        bot.start_player(1, send)  # Already running: no second loop
+        await asyncio.wait_for(bot.guild_states[1].player_task, timeout=5)
+
+        assert voice_client.played == ["one", "two", "three"]
+        # One controls message per guild, edited for each following track
+        assert log == [("send", "**one**"), ("edit", "**two**"), ("edit", "**three**")]
+        assert bot.guild_states[1].player_task is None
+
+    asyncio.run(run())
+
+
+class DummyChannel:
+    def __init__(self, members):
+        self.name = "music"
+        self.members = members
+
+
+class DummyMember:
+    def __init__(self, guild, bot=False):
+        self.guild = guild
+        self.bot = bot
+
+
+class DummyVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+def test_idle_timer_cancelled_when_someone_rejoins():
+    async def run():
+        bot = MusicBot()
+        voice_client = DummyVoiceClient()
+        guild = DummyGuild(voice_client)
+        voice_client.channel = DummyChannel([DummyMember(guild, bot=True)])
+        listener = DummyMember(guild)
+        left = (DummyVoiceState(voice_client.channel), DummyVoiceState(None))
+        joined = (DummyVoiceState(None), DummyVoiceState(voice_client.channel))
+
+        await bot.on_voice_state_update(listener, *left)
+        await bot.on_voice_state_update(listener, *left)
+        timer = bot.guild_states[1].idle_timer
+        assert timer is not None
+
+        # Changes in other channels are ignored
+        elsewhere = DummyVoiceState(DummyChannel([]))
+        voice_client.channel.members.append(listener)
+        await bot.on_voice_state_update(listener, elsewhere, elsewhere)
+        assert not timer.cancelled() and bot.guild_states[1].idle_timer is timer
+
+        await bot.on_voice_state_update(listener, *joined)
+        assert timer.cancelled() and bot.guild_states[1].idle_timer is None
+
+    asyncio.run(run())
+
+
+def test_evict_idle_states_keeps_active_guilds(monkeypatch):
+    bot = MusicBot()
+    monkeypatch.setattr(bot, "get_guild", lambda guild_id: None)
+
+    bot.get_state(1)
+    bot.get_queue(2).add(DummySong("queued"))
+    bot.get_state(3).last_active += 10_000
+
+    now = bot.guild_states[1].last_active + 3601
+    assert bot.evict_idle_states(now) == 1
+    assert set(bot.guild_states) == {2, 3}
+
+
+class DummyResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "error"
+
+
+class BrokenMessage:
+    async def edit(self, **kwargs):
+        raise discord.Forbidden(DummyResponse(403), "archived thread")
+
+
+def test_now_playing_falls_back_and_resets_per_session(monkeypatch):
+    async def run():
+        bot = MusicBot()
+        voice_client = DummyVoiceClient()
+        monkeypatch.setattr(bot, "get_guild", lambda guild_id: DummyGuild(voice_client))
+        log = []
+
+        async def send(**kwargs):
+            log.append(("send", kwargs["embed"].description))
+            return DummyMessage(log)
+
+        # An edit that fails for any HTTP reason falls back to a new message
+        bot.get_state(1).np_message = BrokenMessage()
+        bot.get_queue(1).add(DummySong("one"))
+        bot.start_player(1, send)
+        await asyncio.wait_for(bot.guild_states[1].player_task, timeout=5)
+        assert log == [("send", "**one**")]
+
+        # The finished session's message is not reused by the next one
+        assert bot.guild_states[1].np_message is None
+        bot.get_queue(1).add(DummySong("two"))
+        bot.start_player(1, send)
+        await asyncio.wait_for(bot.guild_states[1].player_task, timeout=5)
+        assert log == [("send", "**one**"), ("send", "**two**")]
+
+        bot.get_state(1).np_message = DummyMessage(log)
+        bot.get_queue(1).add(DummySong("three"))
+        await bot.end_session(1)
+        assert bot.guild_states[1].np_message is None and bot.get_queue(1).is_empty
+
+    asyncio.run(run())
+
+
+def test_now_playing_waits_for_queue_notice(monkeypatch):
+    async def run():
+        bot = MusicBot()
+        voice_client = DummyVoiceClient()
+        monkeypatch.setattr(bot, "get_guild", lambda guild_id: DummyGuild(voice_client))
+        log = []
+
+        async def send(**kwargs):
+            log.append(("send", kwargs["embed"].description))
+            return DummyMessage(log)
+
+        async def queue_notice():
+            await asyncio.sleep(0.01)
+            log.append("added")
+
+        bot.get_queue(1).add(DummySong("one"))
+        notice = asyncio.create_task(queue_notice())
+        bot.start_player(1, send, announce_after=notice)
+        await asyncio.wait_for(bot.guild_states[1].player_task, timeout=5)
+
+        assert voice_client.played == ["one"]
+        assert log == ["added", ("send", "**one**")]
+
+    asyncio.run(run())
+
+
+def test_idle_timer_does_not_revive_dropped_state():
+    bot = MusicBot()
+    bot._on_idle_timer(1)
+    assert 1 not in bot.guild_states
@@ -0,0 +1,57 @@
+import asyncio
+
+import discord
+
+from music_bot import MusicBot
+from music_controls import _check_same_vc, create_music_controls, create_queue_controls
+
+
+def test_control_views_are_shared_and_persistent():
+    async def run():
+        bot = MusicBot()
+        view = create_music_controls(bot)
+        assert create_music_controls(bot) is view
+        assert create_queue_controls(bot) is not view
+        assert view.timeout is None and view.is_persistent()
+
+    asyncio.run(run())
+
+
+class DummyResponse:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, content, ephemeral=False):
+        self.sent.append(content)
+
+
+class DummyInteraction:
+    def __init__(self, user_channel, bot_channel, manage_messages=False):
+        voice_client = type("VoiceClient", (), {"channel": bot_channel})()
+        permissions = type("Permissions", (), {"manage_messages": manage_messages})()
+        voice = type("VoiceState", (), {"channel": user_channel})() if user_channel else None
+        self.guild = type("Guild", (), {"voice_client": voice_client})()
+        member = type("Member", (discord.Member,), {"guild_permissions": permissions, "voice": voice})
+        self.user = member.__new__(member)
+        self.response = DummyResponse()
+
+
+def test_check_same_vc_explains_rejections():
+    async def run():
+        allowed = DummyInteraction("music", "music")
+        assert await _check_same_vc(allowed) and not allowed.response.sent
+
+        moderator = DummyInteraction(None, "music", manage_messages=True)
+        assert await _check_same_vc(moderator)
+
+        # A listener in another channel is told why, rather than left with a failed interaction
+        elsewhere = DummyInteraction("lobby", "music")
+        assert not await _check_same_vc(elsewhere)
+        assert len(elsewhere.response.sent) == 1
+
+        not_a_member = DummyInteraction("music", "music")
+        not_a_member.user = object()
+        assert not await _check_same_vc(not_a_member)
+        assert len(not_a_member.response.sent) == 1
+
+    asyncio.run(run())
@@ -47,6 +47,16 @@ def test_queue_skip_and_clear():
     assert q.is_empty
 
 
+def test_add_next_jumps_the_queue():
+    q = MusicQueue()
+    s1, s2 = DummySong("song1"), DummySong("song2")
+    q.add(s1)
+    q.add_next(s2)
+    assert q.size == 2
+    assert q.get_next() is s2
+    assert q.get_next() is s1
+
+
 def test_queue_shuffle():
     q = MusicQueue()
     songs = [DummySong(str(i)) for i in range(5)]
@@ -54,3 +64,96 @@ def test_queue_shuffle():
         q.add(song)
     q.shuffle()
     assert set(s.title for s in q.queue) == set(str(i) for i in range(5))
+
+
+def test_fisher_yates_permutes_uniformly():
+    from collections import Counter
+    from music_queue import _fisher_yates
+
+    firsts = Counter()
+    for _ in range(3000):
+        items = list(range(4))
+        _fisher_yates(items)
+        assert sorted(items) == [0, 1, 2, 3]
+        firsts[items[0]] += 1
+    # Each value should lead roughly a quarter of the time
+    assert all(600 < count < 900 for count in firsts.values())
+
+
+def test_clear_async_empties_queue():
+    import asyncio
+
+    q = MusicQueue()
+    for i in range(3):
+        q.add(DummySong(str(i)))
+    q.get_next()
+    old = q.queue
+
+    async def run():
+        release = q.clear_async()
+        # Detached before the release is awaited, so callers can reply first
+        assert q.is_empty and q.size == 0
+        await release
+
+    asyncio.run(run())
+    assert q.queue is not old and len(old) == 0
+
+
+def test_shuffle_async_keeps_songs_added_meanwhile(monkeypatch):
+    import asyncio
+    import music_queue
+
+    monkeypatch.setattr(music_queue, "SHUFFLE_OFFLOAD_THRESHOLD", 3)
+
+    async def run():
+        q = MusicQueue()
+        for i in range(5):
+            q.add(DummySong(str(i)))
+        task = asyncio.create_task(q.shuffle_async())
+        await asyncio.sleep(0)  # Let the first pass reach the executor
+        q.add(DummySong("late"))
+        await task
+        assert sorted(s.title for s in q.queue) == ["0", "1", "2", "3", "4", "late"]
+        assert q.size == 6
+
+    asyncio.run(run())
+
+
+def test_shuffle_songs_uses_numpy_permutation_when_available(monkeypatch):
+    import music_queue
+
+    class ReversingRng:
+        def permutation(self, n):
+            order = list(range(n - 1, -1, -1))
+            return type("Permutation", (), {"tolist": lambda self: order})()
+
+    monkeypatch.setattr(music_queue, "_np_rng", ReversingRng())
+    monkeypatch.setattr(music_queue, "NUMPY_SHUFFLE_THRESHOLD", 3)
+    songs = list(range(5))
+    music_queue._shuffle_songs(songs)
+    assert songs == [4, 3, 2, 1, 0]
+
+
+def test_cached_embed_rebuilt_after_changes():
+    q = MusicQueue()
+    builds = []
+
+    def build(queue):
+        builds.append(queue.size)
+        return object()
+
+    first = q.cached_embed(build)
+    assert q.cached_embed(build) is first
+    q.add(DummySong("song1"))
+    second = q.cached_embed(build)
+    assert second is not first
+    q.loop_mode = True
+    q.cached_embed(build)
+    assert builds == [0, 1, 1]
+
+    # Draining the queue drops "Now Playing" from the embed
+    q.loop_mode = False
+    q.get_next()
+    playing = q.cached_embed(build)
+    assert q.get_next() is None and q.current is None
+    assert q.cached_embed(build) is not playing
@@ -1,5 +1,6 @@
 import discord
-from utils import format_duration, create_queue_embed, create_song_embed
+from music_queue import MusicQueue
+from utils import format_duration, create_queue_embed, create_song_embed, normalize_url, playback_state
 
 class DummySong:
     def __init__(self, title, duration=60, uploader="test", thumbnail=None):
@@ -17,6 +18,10 @@ class DummyQueue:
         self.queue = []
         self.loop_mode = False
 
+    @property
+    def size(self):
+        return len(self.queue)
+
 
 def test_format_duration():
     assert format_duration(0) == "Unknown"
@@ -42,9 +47,44 @@ def test_create_queue_embed_with_songs():
     assert any(name.startswith("📝 Up Next") for name in field_names)
 
 
+def test_create_queue_embed_truncates_long_queue():
+    q = MusicQueue()
+    for i in range(15):
+        q.add(DummySong(f"song{i}"))
+    embed = create_queue_embed(q)
+    assert embed.fields[0].value.count("\n") == 9
+    assert embed.fields[1].value == "And 5 more songs"
+
+
 def test_create_song_embed():
     song = DummySong("song", duration=70, uploader="me", thumbnail="http://x")
     embed = create_song_embed(song, title="Info")
     assert embed.title == "Info"
     assert embed.fields[0].name == "Duration"
     assert embed.fields[1].name == "Uploader"
+
+
+class DummyVoiceClient:
+    def __init__(self, playing=False, paused=False):
+        self.playing = playing
+        self.paused = paused
+
+    def is_playing(self):
+        return self.playing
+
+    def is_paused(self):
+        return self.paused
+
+
+def test_playback_state():
+    assert playback_state(None) == "idle"
+    assert playback_state(DummyVoiceClient(playing=True)) == "playing"
+    assert playback_state(DummyVoiceClient(paused=True)) == "paused"
+    assert playback_state(DummyVoiceClient()) == "idle"
+
+
+def test_normalize_url():
+    assert normalize_url("https://youtu.be/abc") == "https://youtu.be/abc"
+    assert normalize_url(" youtu.be/abc ") == "https://youtu.be/abc"
+    assert normalize_url("www.youtube.com/watch?v=abc") == "https://www.youtube.com/watch?v=abc"
+    assert normalize_url("never gonna give you up") is None
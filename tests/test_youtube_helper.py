@@ -1,5 +1,5 @@
-from alternative_extractor import AlternativeExtractor
-from youtube_helper import get_troubleshooting_tips
+from alternative_extractor import AlternativeExtractor, _read_fields
+from youtube_helper import get_troubleshooting_tips, is_bot_detection_error
 from web_server import update_bot_status, bot_status
 from ffmpeg_utils import ffmpeg_manager
 
@@ -10,12 +10,25 @@ def test_extract_video_id():
         "https://youtu.be/abc123",
         "https://www.youtube.com/embed/abc123",
         "https://www.youtube.com/v/abc123",
+        "https://www.youtube.com/shorts/abc123?feature=share",
     ]
     for url in url_variants:
         assert AlternativeExtractor._extract_video_id(url) == "abc123"
     assert AlternativeExtractor._extract_video_id("https://example.com") is None
 
 
+def test_read_oembed_fields():
+    body = (
+        b'{"title": "Song \\"Live\\" \\u00e9", "author_name": "Artist",'
+        b' "thumbnail_url": "https://i.ytimg.com/vi/abc123/hqdefault.jpg", "html": "<iframe title=\\"x\\">"}'
+    )
+    fields = _read_fields(body)
+    assert fields["title"] == 'Song "Live" \u00e9'
+    assert fields["author_name"] == "Artist"
+    assert fields["thumbnail_url"].endswith("hqdefault.jpg")
+    assert _read_fields(b'{"error": "no matching providers found"}') == {"error": "no matching providers found"}
+
+
 def test_get_troubleshooting_tips():
     tips = get_troubleshooting_tips()
     assert any("voice channel" in t for t in tips)
@@ -31,3 +44,9 @@ def test_ffmpeg_options():
     opts = ffmpeg_manager.get_optimal_ffmpeg_options()
     assert "pcm" in opts and "opus" in opts
     assert "before_options" in opts["pcm"]
+
+
+def test_is_bot_detection_error():
+    assert is_bot_detection_error(Exception("ERROR: Sign in to confirm you're not a bot"))
+    assert is_bot_detection_error(Exception("YouTube bot-detection triggered"))
+    assert not is_bot_detection_error(Exception("Video unavailable"))
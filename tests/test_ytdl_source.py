@@ -0,0 +1,34 @@
+import asyncio
+
+import ytdl_source
+from ytdl_source import YTDLSource
+
+
+class DummyExtractor:
+    def __init__(self):
+        self.calls = 0
+
+    async def search_youtube(self, query):
+        self.calls += 1
+        return {"webpage_url": "https://www.youtube.com/watch?v=abc", "title": "Song", "url": "stream"}
+
+
+def test_search_results_cached_by_normalized_query(monkeypatch):
+    extractor = DummyExtractor()
+    monkeypatch.setattr(ytdl_source, "get_modern_extractor", lambda: extractor)
+    monkeypatch.setattr(YTDLSource, "_search_cache", ytdl_source._TTLCache(maxsize=4, ttl=600))
+
+    first = asyncio.run(YTDLSource.search_youtube("Never Gonna"))
+    second = asyncio.run(YTDLSource.search_youtube("  never   gonna "))
+
+    assert extractor.calls == 1
+    assert second["webpage_url"] == first["webpage_url"]
+    assert "url" not in second  # Expiring stream URLs stay out of the cache
+
+
+def test_step_volume_moves_in_whole_steps():
+    song = YTDLSource(object(), data={"title": "song"}, volume=0.7)
+    assert [song.step_volume(-1) for _ in range(3)] == [60, 50, 40]
+    assert song.volume == 0.4
+    assert song.step_volume(10) == 100
+    assert song.step_volume(-20) == 0
@@ -1,10 +1,17 @@
 """Utility functions for the Discord Music Bot."""
 
 import discord
-from typing import List, Any
+from itertools import islice
+from typing import List, Any, Optional
 
 from config import MAX_QUEUE_DISPLAY
 
+# Shared embed colors, created once
+NOW_PLAYING_COLOR = discord.Color.blue()
+
+# Inputs starting with these are played as URLs rather than searched
+_URL_PREFIXES = ('http://', 'https://', 'www.', 'youtu.be/', 'youtube.com/', 'm.youtube.com/', 'music.youtube.com/')
+
 
 def format_duration(duration: int) -> str:
     """Format duration in seconds as MM:SS string."""
@@ -16,6 +23,23 @@ def format_duration(duration: int) -> str:
     return f"{minutes}:{seconds:02d}"
 
 
+def normalize_url(query: str) -> Optional[str]:
+    """Return the query as an https URL if it looks like one, else None."""
+    query = query.strip()
+    if not query.startswith(_URL_PREFIXES):
+        return None
+    return query if query.startswith(('http://', 'https://')) else f"https://{query}"
+
+
+def playback_state(voice_client: Any) -> str:
+    """Return 'playing', 'paused' or 'idle' for a voice client (None counts as idle)."""
+    if voice_client is None:
+        return 'idle'
+    if voice_client.is_playing():
+        return 'playing'
+    return 'paused' if voice_client.is_paused() else 'idle'
+
+
 def create_embed(title: str, description: str = "", color: discord.Color = discord.Color.blue()) -> discord.Embed:
     """Create a standardized embed with consistent styling."""
     return discord.Embed(title=title, description=description, color=color)
@@ -41,23 +65,24 @@ def create_queue_embed(queue) -> discord.Embed:
             )
     
     # Show queue
-    if queue.queue:
+    size = queue.size
+    if size:
         queue_list = []
-        display_count = min(len(queue.queue), MAX_QUEUE_DISPLAY)
+        display_count = min(size, MAX_QUEUE_DISPLAY)
         
-        for i, song in enumerate(queue.queue[:display_count], 1):
+        for i, song in enumerate(islice(queue.queue, display_count), 1):
             queue_list.append(f"{i}. **{song.title}**")
         
         embed.add_field(
-            name=f"📝 Up Next ({len(queue.queue)} songs)",
+            name=f"📝 Up Next ({size} songs)",
             value="\n".join(queue_list) if queue_list else "No songs in queue",
             inline=False
         )
         
-        if len(queue.queue) > MAX_QUEUE_DISPLAY:
+        if size > MAX_QUEUE_DISPLAY:
             embed.add_field(
                 name="...",
-                value=f"And {len(queue.queue) - MAX_QUEUE_DISPLAY} more songs",
+                value=f"And {size - MAX_QUEUE_DISPLAY} more songs",
                 inline=False
             )
     else:
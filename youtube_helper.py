@@ -1,8 +1,16 @@
 """YouTube help and troubleshooting utilities."""
 
+import re
 import discord
 from typing import List
 
+# yt-dlp / extractor messages that mean YouTube flagged the bot
+_YT_BOT_RE = re.compile(r"sign in to confirm.*not a bot|bot.?detect", re.IGNORECASE)
+
+def is_bot_detection_error(error: BaseException) -> bool:
+    """Check whether an exception comes from YouTube's bot detection."""
+    return _YT_BOT_RE.search(str(error)) is not None
+
 def create_youtube_blocked_embed() -> discord.Embed:
     """Create an embed explaining YouTube bot detection issues."""
     embed = discord.Embed(
@@ -8,7 +8,7 @@ import os
 from typing import Optional, Dict, Any, ClassVar
 
 from config import YTDL_FORMAT_OPTIONS, FFMPEG_OPTIONS, FFMPEG_OPUS_OPTIONS, RENDER_FFMPEG_OPTIONS, DEFAULT_VOLUME, MAX_SEARCH_RESULTS
-from modern_youtube import get_modern_extractor, get_multi_source_player
+from modern_youtube import _TTLCache, get_modern_extractor, get_multi_source_player
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +26,13 @@ def get_ffmpeg_options() -> Dict[str, str]:
 class YTDLSource:
     """YouTube audio source for Discord voice playback."""
     
-    ytdl: ClassVar[yt_dlp.YoutubeDL] = yt_dlp.YoutubeDL(YTDL_FORMAT_OPTIONS)
+    # Every queued song is one of these, so skip the per-instance __dict__
+    __slots__ = ('_source', 'data', 'title', 'url', 'duration', 'uploader', 'thumbnail',
+                 'volume', 'source', 'supports_volume')
+    
+    ytdl: ClassVar[yt_dlp.YoutubeDL] = yt_dlp.YoutubeDL(dict(YTDL_FORMAT_OPTIONS))  # yt-dlp rewrites params['http_headers'] in place
+    # Normalized query -> {webpage_url, title, duration}; stream URLs expire, so they're never cached
+    _search_cache: ClassVar[_TTLCache] = _TTLCache(maxsize=512, ttl=600)
     
     def __init__(self, source: discord.AudioSource, *, data: Dict[str, Any], volume: float = DEFAULT_VOLUME):
         # Store the raw source and data
@@ -56,6 +62,13 @@ class YTDLSource:
         elif not self.supports_volume:
             logger.warning("Volume control not supported for Opus audio sources")
     
+    def step_volume(self, steps: int) -> int:
+        """Move the volume by whole 10% steps, clamped to 0-100, and return the new percentage."""
+        # Step from the rounded percentage so repeated clicks don't accumulate float error
+        percent = max(0, min(100, round(self.volume * 100) + steps * 10))
+        self.set_volume(percent / 100)
+        return percent
+    
     def get_playable_source(self) -> discord.AudioSource:
         """Get the Discord AudioSource that can be played."""
         return self.source
@@ -63,8 +76,6 @@ class YTDLSource:
     @classmethod
     async def from_url(cls, url: str, *, loop: Optional[asyncio.AbstractEventLoop] = None, stream: bool = False) -> 'YTDLSource':
         """Extract audio from YouTube URL using modern extraction with smart fallback."""
-        loop = loop or asyncio.get_event_loop()
-        
         try:
             logger.info(f"Extracting audio from URL: {url}")
             
@@ -118,7 +129,11 @@ class YTDLSource:
     @classmethod
     async def search_youtube(cls, query: str, *, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[Dict[str, Any]]:
         """Search YouTube for a query using modern extraction."""
-        loop = loop or asyncio.get_event_loop()
+        key = ' '.join(query.lower().split())
+        cached = cls._search_cache.get(key)
+        if cached:
+            logger.info(f"Using cached search result for: {query}")
+            return cached
         
         try:
             logger.info(f"Searching YouTube for: {query}")
@@ -129,6 +144,12 @@ class YTDLSource:
             
             if result:
                 logger.info(f"Found video: {result.get('title', 'Unknown')}")
+                if result.get('webpage_url'):
+                    cls._search_cache[key] = {
+                        'webpage_url': result['webpage_url'],
+                        'title': result.get('title'),
+                        'duration': result.get('duration'),
+                    }
                 return result
             
             logger.warning(f"No results found for query: {query}")
@@ -141,8 +162,6 @@ class YTDLSource:
     @classmethod
     async def search_youtube_multiple(cls, query: str, *, loop: Optional[asyncio.AbstractEventLoop] = None) -> list:
         """Search YouTube for multiple results using modern extraction."""
-        loop = loop or asyncio.get_event_loop()
-        
         try:
             logger.info(f"Searching YouTube for multiple results: {query}")
             
@@ -151,14 +170,11 @@ class YTDLSource:
             
             # Create a search-specific extraction
             search_query = f"ytsearch{MAX_SEARCH_RESULTS}:{query}"
-            opts = modern_extractor.base_opts.copy()
+            opts = modern_extractor.opts_with_cookie()
             opts['format'] = 'bestaudio[ext=webm]/bestaudio'
             
             with yt_dlp.YoutubeDL(opts) as ydl:
-                data = await loop.run_in_executor(
-                    None, 
-                    lambda: ydl.extract_info(search_query, download=False)
-                )
+                data = await asyncio.to_thread(ydl.extract_info, search_query, download=False)
             
             if 'entries' in data:
                 logger.info(f"Found {len(data['entries'])} results")